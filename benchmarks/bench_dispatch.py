@@ -0,0 +1,222 @@
+"""Benchmarks for the dispatch hot paths. The HTTP cases use the stand-in server from the test
+suite, so run this as a module from the repository root, where `tests` is importable:
+
+    python -m benchmarks.bench_dispatch --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks.bench_dispatch --compare old_results.json --output new_results.json
+
+Each case reports events/sec, per-event latency percentiles (from a sample of individually timed
+events) and peak Python memory. Memory is traced in a second pass, since tracing slows the code
+down too much to time it at the same time. tracemalloc needs Python 3.4, on older versions memory
+is not measured. Results record the git revision of the checkout they were measured on. HTTP cases run against an in-process stand-in server, so the
+numbers measure client overhead rather than a real network."""
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from mri.dispatch import MatplotlibDispatch, MriServerDispatch
+from mri.dispatch.BaseDispatch import BaseDispatch
+from mri.event import TrainingEvent
+from tests.stand_in_server import StandInServer
+
+ATTRIBUTES = ['iteration', 'loss', 'accuracy']
+# Cases that do real work per event are capped so a full run stays in minutes
+DEFAULT_CAPS = {'server_sync': 10000, 'server_async': 100000, 'matplotlib_classic': 200}
+
+
+def _events(n):
+    return [TrainingEvent({'iteration': i, 'loss': 1.0 / (i + 1), 'accuracy': i / float(n)}, 'iteration')
+            for i in range(n)]
+
+
+def _measure(name, n, setup, run_one, finish=None, memory=True):
+    """Time `run_one(state, i)` for i in range(n), sampling individual latencies, then optionally
+    repeat the run while tracing memory"""
+    result = _time(name, n, setup, run_one, finish)
+    if memory:
+        state = setup()
+        tracemalloc.start()
+        for i in range(n):
+            run_one(state, i)
+        if finish is not None:
+            finish(state)
+        result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def _time(name, n, setup, run_one, finish):
+    state = setup()
+    sample_every = max(1, n // 1000)
+    latencies = []
+    clock = timeit.default_timer
+    start = clock()
+    for i in range(n):
+        if i % sample_every == 0:
+            t0 = clock()
+            run_one(state, i)
+            latencies.append(clock() - t0)
+        else:
+            run_one(state, i)
+    if finish is not None:
+        finish(state)
+    elapsed = clock() - start
+    latencies.sort()
+    return {
+        'case': name,
+        'events': n,
+        'seconds': elapsed,
+        'events_per_sec': n / elapsed if elapsed else None,
+        'latency_p50': latencies[len(latencies) // 2],
+        'latency_p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'peak_memory_bytes': None
+    }
+
+
+def bench_event_construction(n, memory):
+    def run(state, i):
+        TrainingEvent({'iteration': i, 'loss': 0.5, 'accuracy': 0.5}, 'iteration')
+    return _measure('event_construction', n, lambda: None, run, memory=memory)
+
+
+def bench_base_validation(n, memory):
+    events = _events(n)
+
+    def setup():
+        dispatch = BaseDispatch()
+        dispatch.setup_display('iteration', ATTRIBUTES)
+        return dispatch
+    return _measure('base_validation', n, setup, lambda d, i: d.train_event(events[i]), memory=memory)
+
+
+def bench_server(n, memory, address, asynchronous):
+    events = _events(n)
+
+    def setup():
+        dispatch = MriServerDispatch({'title': 'bench', 'id': 'bench'}, address, 'u', 'p',
+                                     asynchronous=asynchronous, queue_size=0)
+        dispatch.setup_display('iteration', list(ATTRIBUTES))
+        return dispatch
+    name = 'server_async' if asynchronous else 'server_sync'
+    return _measure(name, n, setup, lambda d, i: d.train_event(events[i]), lambda d: d.train_finish(), memory)
+
+
+def bench_matplotlib(n, memory, folder, incremental):
+    events = _events(n)
+
+    def setup():
+        dispatch = MatplotlibDispatch({'title': 'bench'}, folder, incremental=incremental)
+        dispatch.setup_display('iteration', list(ATTRIBUTES))
+        return dispatch
+    name = 'matplotlib_incremental' if incremental else 'matplotlib_classic'
+    return _measure(name, n, setup, lambda d, i: d.train_event(events[i]), lambda d: d.train_finish(), memory)
+
+
+def run_all(sizes, caps, memory=True):
+    import matplotlib
+    matplotlib.use('Agg')
+    results = []
+    folder = tempfile.mkdtemp()
+    try:
+        with StandInServer() as stand_in:
+            for n in sizes:
+                cases = [
+                    ('event_construction', bench_event_construction, ()),
+                    ('base_validation', bench_base_validation, ()),
+                    ('server_sync', bench_server, (stand_in.address, False)),
+                    ('server_async', bench_server, (stand_in.address, True)),
+                    ('matplotlib_incremental', bench_matplotlib, (folder, True)),
+                    ('matplotlib_classic', bench_matplotlib, (folder, False)),
+                ]
+                for name, case, args in cases:
+                    if n > caps.get(name, n):
+                        continue
+                    result = case(n, memory, *args)
+                    print('{case:>24} n={events:<8} {events_per_sec:>12.0f} ev/s  '
+                          'p50 {latency_p50:.2e}s  p99 {latency_p99:.2e}s  peak {peak_memory_bytes} B'
+                          .format(**result))
+                    results.append(result)
+                    # The stand-in keeps every request, don't let that skew later memory numbers
+                    del stand_in.requests[:]
+    finally:
+        shutil.rmtree(folder)
+    return results
+
+
+def compare(old, new, threshold):
+    """Print cases whose throughput dropped by more than `threshold`, returns True if any did"""
+    old_cases = dict(((r['case'], r['events']), r) for r in old['results'])
+    regressed = False
+    for result in new['results']:
+        before = old_cases.get((result['case'], result['events']))
+        if before is None or not before['events_per_sec']:
+            continue
+        change = result['events_per_sec'] / before['events_per_sec'] - 1
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print('{0:>24} n={1:<8} {2:+.1%}{3}'.format(result['case'], result['events'], change, flag))
+    return regressed
+
+
+def _revision():
+    """Git revision of the checkout being measured, None outside a git checkout"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=root, stderr=devnull)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('ascii').strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--output', default='bench_results.json', help='JSON file to write results to')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative throughput drop reported as a regression')
+    parser.add_argument('--no-caps', action='store_true', help='Run every case at every size')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the memory tracing pass')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    memory = not args.no_memory and tracemalloc is not None
+    if not args.no_memory and not memory:
+        print('tracemalloc is not available, skipping the memory tracing pass')
+    results = {
+        'revision': _revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': run_all(args.sizes, {} if args.no_caps else DEFAULT_CAPS, memory)
+    }
+    with io.open(args.output, 'w', encoding='utf-8') as out:
+        out.write(json.dumps(results, indent=2, sort_keys=True))
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as old_file:
+            if compare(json.load(old_file), results, args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Measures the cost of `import mri` plus creating a server dispatch, in fresh interpreters.
+Run from the repository root:
+
+    python -m benchmarks.bench_import --runs 20 --output import_results.json
+
+Fails if importing pulls in modules that should only be loaded on use, eg. Matplotlib."""
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import argparse
+import io
+import json
+import subprocess
+import sys
+
+# Modules the server backend must not load
+HEAVY = ['matplotlib', 'numpy', 'asyncio']
+
+SCRIPT = """
+import sys, timeit
+start = timeit.default_timer()
+import mri
+server = mri.MriServer('http://localhost:1', 'user', 'pass')
+server.new_dispatch({'title': 'bench', 'id': 'bench'})
+elapsed = timeit.default_timer() - start
+print(repr((elapsed, [m for m in %r if m in sys.modules])))
+""" % HEAVY
+
+
+def measure(runs):
+    timings = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT]).decode('utf-8')
+        elapsed, heavy = eval(output.strip().splitlines()[-1])
+        timings.append(elapsed)
+        loaded.update(heavy)
+    timings.sort()
+    return {
+        'runs': runs,
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'max': timings[-1],
+        'heavy_modules_loaded': sorted(loaded)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--output', default='import_results.json', help='JSON file to write results to')
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print('import mri + server dispatch: median {median:.3f}s, min {min:.3f}s, max {max:.3f}s'.format(**result))
+    with io.open(args.output, 'w', encoding='utf-8') as out:
+        out.write(json.dumps(result, indent=2, sort_keys=True))
+    if result['heavy_modules_loaded']:
+        print('Heavy modules loaded at import: {0}'.format(', '.join(result['heavy_modules_loaded'])))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from mri.MriServer import MriServer
+from mri.dispatch import AsyncMriServerDispatch
+
+
+class AsyncMriServer(object):
+    """asyncio counterpart of MriServer. All requests made through this server and the
+    dispatches it creates share one bounded thread pool, so `max_in_flight` caps the number of
+    concurrent requests to the server no matter how many runs report from the event loop.
+
+    Arguments
+    ---------
+    address : string
+        URL of the server to connect to
+
+    username : string
+        Server username
+
+    password : string
+        Server password
+
+    max_in_flight : int
+        Maximum number of concurrent requests to the server
+
+    pool_size : int
+        Number of keep-alive connections to hold open to the server, see MriServer
+    """
+    def __init__(self, address, username, password, max_in_flight=8, pool_size=None):
+        self._server = MriServer(address, username, password,
+                                 pool_size=max_in_flight if pool_size is None else pool_size)
+        self._executor = ThreadPoolExecutor(max_in_flight)
+
+    @property
+    def address(self):
+        return self._server.address
+
+    @property
+    def metrics(self):
+        return self._server.metrics
+
+    def new_dispatch(self, task, **kwargs):
+        """Create an AsyncMriServerDispatch for `task` sharing this server's connections and
+        request limit, see MriServer.new_dispatch"""
+        return AsyncMriServerDispatch(task, self._server.address, self._server.auth[0], self._server.auth[1],
+                                      executor=self._executor, pool=self._server.pool,
+                                      metrics=self._server.metrics, **kwargs)
+
+    async def wipe_database(self):
+        """Completely wipe the database of the server, see MriServer.wipe_database"""
+        return await self._run(self._server.wipe_database)
+
+    async def delete_report(self, report_id):
+        """Remove a report from the database by ID, see MriServer.delete_report"""
+        return await self._run(self._server.delete_report, report_id)
+
+    async def get_reports(self):
+        """Get a dictionary of {id: title} for reports on this server, see MriServer.get_reports"""
+        return await self._run(self._server.get_reports)
+
+    async def search_reports(self, title):
+        """Search for reports by title on this server, see MriServer.search_reports"""
+        return await self._run(self._server.search_reports, title)
+
+    def close(self):
+        """Stop the request threads once pending requests are done"""
+        self._executor.shutdown(wait=True)
+
+    async def _run(self, fn, *args):
+        loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
@@ -1,6 +1,9 @@
+from array import array
+import json
+import logging
 import urllib.parse
 
-from mri.utilities import send_request
+from mri.utilities import ServerConsts, ClientMetrics, RateLimiter, ReportIndex, SessionPool, Spool, send_request
 from mri.dispatch import MriServerDispatch
 
 
@@ -19,21 +22,145 @@ class MriServer(object):
 
     password : string
         Server password
+
+    pool_size : int
+        Number of keep-alive connections to hold open to the server. If not given, the server
+        shares the default session pool with every other client
+
+    cache_ttl : float
+        Number of seconds the report listing is cached for `get_reports` and `search_reports`.
+        Reports created by dispatches or deleted through this server update the cache directly
+
+    timeout : tuple
+        (connect, read) timeouts in seconds for requests made by this server
+
+    retries : int
+        Number of retries for idempotent requests made by this server, see send_request
+
+    metrics : mri.utilities.ClientMetrics
+        Metrics for requests made by this server and the dispatches it creates. Defaults to a new
+        ClientMetrics, available as `metrics`
+
+    Requests are not rate limited unless `set_rate_limits` is called
     """
-    def __init__(self, address, username, password):
+    def __init__(self, address, username, password, pool_size=None, cache_ttl=60, timeout=ServerConsts.TIMEOUT,
+                 retries=2, metrics=None):
         self.address = address
+        self.metrics = metrics if metrics is not None else ClientMetrics()
         self.auth = (username, password)
+        self.timeout = timeout
+        self.retries = retries
+        self.pool = SessionPool(pool_size) if pool_size is not None else SessionPool.default()
+        self.index = ReportIndex(cache_ttl)
+        ReportIndex.register(address, self.index)
+
+    def set_rate_limits(self, requests_per_second=None, bytes_per_second=None, burst=1.0, lock_path=None):
+        """Limit the rate of requests to this server. The limits are shared by every client in
+        the process talking to the same server, including the dispatches, and with `lock_path`
+        by every process on the host using that file. Call with no limits to remove them
+
+        Arguments
+        ---------
+        requests_per_second : float
+            Sustained request rate, None for no limit
+
+        bytes_per_second : float
+            Sustained rate of request body bytes, None for no limit
+
+        burst : float
+            Seconds of budget that can be saved up and spent at once
 
-    def new_dispatch(self, task):
+        lock_path : string
+            File to share the limits through between processes, see RateLimiter
+
+        Returns
+        -------
+        limiter : mri.utilities.RateLimiter
+            The limiter shared by requests to this server
+        """
+        limiter = RateLimiter.for_address(self.address)
+        limiter.set_limits(requests_per_second, bytes_per_second, burst, lock_path)
+        return limiter
+
+    def new_dispatch(self, task, **kwargs):
         """Creates a new dispatch based on the passed task. The dispatch is standalone, so this class will not have
-        any information about it or its state.
+        any information about it or its state. It does share this server's connection pool and
+        metrics.
+
+        Arguments
+        ---------
+        task : dict
+            A dictionary defining a task. At the minimum must have a name and a unique ID
+
+        kwargs
+            Extra keyword arguments passed along to MriServerDispatch, eg. `asynchronous`
+        """
+        kwargs.setdefault('metrics', self.metrics)
+        return MriServerDispatch(task, self.address, self.auth[0], self.auth[1], pool=self.pool, **kwargs)
+
+    def provision_dispatches(self, tasks, time_axis, attributes, max_workers=8, **kwargs):
+        """Creates and sets up a dispatch for each task, creating and configuring their reports
+        concurrently rather than one after the other, eg. when launching a sweep
+
+        Arguments
+        ---------
+        tasks : list
+            Task dictionaries, see `new_dispatch`
+
+        time_axis : string
+            Name of attribute representing time, passed to every `setup_display`
+
+        attributes : list
+            Attributes to plot, passed to every `setup_display`
+
+        max_workers : int
+            Maximum number of reports set up at once
+
+        kwargs
+            Extra keyword arguments passed along to MriServerDispatch, eg. `asynchronous`
+
+        Returns
+        -------
+        dispatches : list
+            Dispatch for each task, in order, with its report set up
+        """
+        dispatches = [self.new_dispatch(task, **kwargs) for task in tasks]
+        if dispatches:
+            # concurrent.futures needs the futures backport on Python 2, so only import it here
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(min(max_workers, len(dispatches))) as executor:
+                list(executor.map(lambda d: d.setup_display(time_axis, attributes), dispatches))
+        return dispatches
+
+    def resume_dispatch(self, task, report_id=None, resume_after=None, **kwargs):
+        """Creates a dispatch that appends to an existing report rather than creating a new one,
+        eg. when restarting a preempted job. The report and its visualization are reused as is, so
+        the dispatch sends nothing but events
 
         Arguments
         ---------
         task : dict
             A dictionary defining a task. At the minimum must have a name and a unique ID
+
+        report_id : string
+            ID of the report to append to. If not given, the report titled like the task is used,
+            and a new report is created if there is none
+
+        resume_after : float
+            Only send events whose time axis value is greater than `resume_after`
+
+        kwargs
+            Extra keyword arguments passed along to MriServerDispatch, eg. `asynchronous`
         """
-        return MriServerDispatch(task, self.address, self.auth[0], self.auth[1])
+        if report_id is None:
+            ids = sorted(self.search_reports(task['title']))
+            if len(ids) > 1:
+                logging.warning('Found {0} reports titled {1}, resuming {2}'.format(len(ids), task['title'], ids[-1]))
+            if ids:
+                report_id = ids[-1]
+            else:
+                logging.info('No report titled {0} to resume, creating a new one'.format(task['title']))
+        return self.new_dispatch(task, report_id=report_id, resume_after=resume_after, **kwargs)
 
     def wipe_database(self):
         """Completely wipe the database of the server, which includes events, reports, and alerts
@@ -48,7 +175,9 @@ class MriServer(object):
             Response from the server, includes response code, encoding, and text
         """
         endpoint = urllib.parse.urljoin(self.address, "/api/data")
-        return send_request(endpoint, "DELETE", None, self.auth)
+        result = self._send_request(endpoint, "DELETE")
+        self.index.invalidate()
+        return result
 
     def delete_report(self, report_id):
         """Remove a report from the database by ID
@@ -64,43 +193,247 @@ class MriServer(object):
             Response from the server, includes response code, encoding, and text
         """
         endpoint = urllib.parse.urljoin(self.address, "/api/report/" + report_id)
-        return send_request(endpoint, "DELETE", None, self.auth)
+        result = self._send_request(endpoint, "DELETE")
+        if result is not None and result.status_code == 200:
+            self.index.remove(report_id)
+        return result
 
-    def get_reports(self):
-        """Get a list of reports on this server
+    def delete_reports(self, ids=None, title=None, mode='exact', predicate=None, max_workers=8):
+        """Remove many reports at once, eg. after a hyperparameter sweep. Reports matching every
+        given criterion are found in a single fresh listing, so reports created since the cached
+        one are included, and deleted concurrently
 
         Arguments
         ---------
-        None
+        ids : list
+            IDs of the reports to remove. If only ids are given, the listing isn't downloaded
+
+        title : string
+            Only remove reports matching this title, see `search_reports`
+
+        mode : string
+            How `title` is matched: 'exact', 'prefix' or 'substring'
+
+        predicate : callable
+            Only remove reports for which predicate(report_id, title) is true
+
+        max_workers : int
+            Maximum number of deletes in flight at once
+
+        Returns
+        -------
+        results : dict
+            Response from the server for each report ID, None if the request could not be sent
+        """
+        if ids is None and title is None and predicate is None:
+            raise ValueError('Give ids, a title or a predicate to select reports, or use wipe_database')
+        if title is None and predicate is None:
+            targets = list(ids)
+        else:
+            reports = self.get_reports(refresh=True)
+            if ids is not None:
+                ids = set(ids)
+            matches = set(self.index.search(title, mode)) if title is not None else reports
+            targets = [report_id for report_id in reports
+                       if report_id in matches and
+                       (ids is None or report_id in ids) and
+                       (predicate is None or predicate(report_id, reports[report_id]))]
+        if not targets:
+            return {}
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(min(max_workers, len(targets))) as executor:
+            return dict(zip(targets, executor.map(self.delete_report, targets)))
+
+    def get_reports(self, refresh=False):
+        """Get a list of reports on this server. The listing is cached for `cache_ttl` seconds
+
+        Arguments
+        ---------
+        refresh : bool
+            If True, download the listing even if the cached one is still fresh
 
         Returns
         -------
         reports : dict
             List of reports, in format {id: title}
         """
-        endpoint = urllib.parse.urljoin(self.address, "/api/reports")
-        req = send_request(endpoint, "GET", None, self.auth)
-        reports = {}
-        for r in req.json():
-            reports[r['id']] = r['title']
-        return reports
+        if refresh or self.index.stale:
+            endpoint = urllib.parse.urljoin(self.address, "/api/reports")
+            req = self._send_request(endpoint, "GET")
+            reports = {}
+            for r in req.json():
+                reports[r['id']] = r['title']
+            self.index.update(reports)
+        return self.index.reports()
 
-    def search_reports(self, title):
-        """Search for reports by title on this server
+    def search_reports(self, title, mode='exact'):
+        """Search for reports by title on this server, using the cached report listing
 
         Arguments
         ---------
         title : string
             Name of the report to find
 
+        mode : string
+            'exact' to match the whole title, 'prefix' to match titles starting with `title`, or
+            'substring' to match titles containing `title`
+
         Returns
         -------
         ids : list
             List of ids matching the title
         """
-        ids = []
-        reports = self.get_reports()
-        for id_val, name in reports.items():
-            if name == title:
-                ids.append(id_val)
-        return ids
+        if self.index.stale:
+            self.get_reports(refresh=True)
+        return self.index.search(title, mode)
+
+    def iter_events(self, report_id, page_size=1000):
+        """Stream the events of a report from the server, downloading `page_size` events at a time
+        so only one page is held in memory. This relies on the server answering
+        GET /api/report/<id> with the report's visualizations, and GET /api/events with `type`,
+        `skip` and `limit` query parameters with a page of events
+
+        Arguments
+        ---------
+        report_id : string
+            ID of the report to download
+
+        page_size : int
+            Number of events per request
+
+        Returns
+        -------
+        events : generator
+            Attributes of each event, in the order the server stores them
+        """
+        event_type, _, _ = self._report_config(report_id)
+        return self._iter_pages(event_type, page_size)
+
+    def get_events(self, report_id, attributes=None, page_size=1000):
+        """Download the events of a report as NumPy arrays. Events are decoded page by page, so
+        only the arrays and a single page are held in memory
+
+        Arguments
+        ---------
+        report_id : string
+            ID of the report to download
+
+        attributes : list
+            Attributes to download, defaults to the fields plotted by the report
+
+        page_size : int
+            Number of events per request
+
+        Returns
+        -------
+        data : dict
+            Maps the report's time axis and each attribute to an array of values, one per event.
+            Values an event doesn't have are NaN. Attributes with values that aren't numbers are
+            returned as lists of the values instead, with None where an event doesn't have one
+        """
+        import numpy as np
+        event_type, time_axis, fields = self._report_config(report_id)
+        names = [time_axis] + [a for a in (attributes or fields) if a != time_axis]
+        # Numeric columns are (values, missing) arrays until a value that isn't a number turns
+        # them into a plain list
+        columns = dict((name, (array('d'), array(str('B')))) for name in names)
+        for properties in self._iter_pages(event_type, page_size):
+            for name in names:
+                value = properties.get(name)
+                column = columns[name]
+                if isinstance(column, list):
+                    column.append(value)
+                    continue
+                try:
+                    number = float('nan') if value is None else float(value)
+                except (TypeError, ValueError):
+                    values, missing = column
+                    column = columns[name] = [None if m else v for v, m in zip(values, missing)]
+                    column.append(value)
+                    continue
+                column[0].append(number)
+                column[1].append(value is None)
+        return dict((name, column if isinstance(column, list) else np.array(column[0], dtype=float))
+                    for name, column in columns.items())
+
+    def get_events_many(self, report_ids, attributes=None, page_size=1000, max_workers=8):
+        """Download the events of many reports concurrently, see `get_events`. Keep `max_workers`
+        within the server's `pool_size` so every download has a kept-alive connection
+
+        Returns
+        -------
+        data : dict
+            Maps each report ID to the result of `get_events` for it
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures = dict((report_id, executor.submit(self.get_events, report_id, attributes, page_size))
+                           for report_id in report_ids)
+        return dict((report_id, future.result()) for report_id, future in futures.items())
+
+    def _report_config(self, report_id):
+        """Event type, time axis and fields of the first plot of a report, from GET /api/report/<id>"""
+        endpoint = urllib.parse.urljoin(self.address, ServerConsts.API_URL.REPORT_ID + report_id)
+        result = self._send_request(endpoint, "GET")
+        if result is None or result.status_code != 200:
+            raise IOError('Could not get report {0}'.format(report_id))
+        for visualization in result.json().get('visualizations', []):
+            if visualization.get('eventName'):
+                configuration = visualization.get('configuration', {})
+                fields = [f for f in configuration.get('fields', '').split(',') if f]
+                return visualization['eventName'], configuration.get('sample'), fields
+        raise ValueError('Report {0} has no visualization to take events from'.format(report_id))
+
+    def _iter_pages(self, event_type, page_size):
+        """Yield the properties of every event of `event_type`, one page at a time, from
+        GET /api/events?type=<type>&skip=<n>&limit=<page_size>"""
+        endpoint = urllib.parse.urljoin(self.address, ServerConsts.API_URL.EVENT)
+        skip = 0
+        while True:
+            query = urllib.parse.urlencode([('type', event_type), ('skip', skip), ('limit', page_size)])
+            result = self._send_request(endpoint + '?' + query, "GET")
+            if result is None or result.status_code != 200:
+                raise IOError('Could not download events of type {0}'.format(event_type))
+            page = result.json()
+            for event in page:
+                yield event['properties']
+            if len(page) < page_size:
+                return
+            skip += len(page)
+
+    def replay_spool(self, path, batch_size=1000):
+        """Send events spooled by an MriServerDispatch to the server in bulk. The spool is
+        streamed from disk, so it doesn't have to fit in memory. Events that are sent are removed
+        from the spool; if the server goes down again the rest are kept for another replay
+
+        Arguments
+        ---------
+        path : string
+            Path of the spool file to replay
+
+        batch_size : int
+            Maximum number of events per request
+
+        Returns
+        -------
+        sent : int
+            Number of events sent to the server
+        """
+        endpoint = urllib.parse.urljoin(self.address, ServerConsts.API_URL.EVENT)
+
+        def send_batch(payloads):
+            result = self._send_request(endpoint, "POST", json.dumps(payloads))
+            if result is not None and 400 <= result.status_code < 500:
+                # The server only takes one event per request
+                for payload in payloads:
+                    result = self._send_request(endpoint, "POST", json.dumps(payload))
+                    if result is None or result.status_code != 200:
+                        return False
+                return True
+            return result is not None and result.status_code == 200
+        return Spool(path).replay(send_batch, batch_size)
+
+    def _send_request(self, endpoint, protocol, data=None):
+        """Send a request to this server over its pooled session"""
+        return send_request(endpoint, protocol, data, self.auth, self.pool.get_session(self.address),
+                            timeout=self.timeout, retries=self.retries, metrics=self.metrics)
@@ -4,4 +4,17 @@ from __future__ import division
 from __future__ import absolute_import
 from future import standard_library
 standard_library.install_aliases()
+import sys
 from .MriServer import MriServer
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # asyncio is slow to import, so the async client is only loaded when asked for
+        if name == 'AsyncMriServer':
+            from .AsyncMriServer import AsyncMriServer
+            # Importing the submodule binds its name here, replace it with the class
+            globals()['AsyncMriServer'] = AsyncMriServer
+            return AsyncMriServer
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+elif sys.version_info >= (3, 5):
+    from .AsyncMriServer import AsyncMriServer
@@ -0,0 +1,83 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .MriServerDispatch import MriServerDispatch
+
+
+class AsyncMriServerDispatch(object):
+    """asyncio counterpart of MriServerDispatch. Requests are made on a bounded thread pool so
+    many dispatches can report from one event loop; the size of the pool caps the number of
+    requests in flight. Dispatches created by the same AsyncMriServer share its pool. Calls on
+    one dispatch are sent one at a time in the order they were made, so concurrent
+    `train_event` calls reach the server in order.
+
+    Arguments
+    ---------
+    task_params : dict
+        Dictionary of the task json specification, including title and ID number
+
+    address : string
+        Server address, generally a hosted URL
+
+    username : string
+        Username for the mri-server
+
+    password : string
+        Password for the mri-server
+
+    max_in_flight : int
+        Maximum number of concurrent requests, ignored if `executor` is given
+
+    executor : concurrent.futures.Executor
+        Executor to make requests on. If not given, the dispatch creates its own and shuts it
+        down in `train_finish`
+
+    kwargs
+        Extra keyword arguments passed along to MriServerDispatch, eg. `pool` or `spool_folder`
+    """
+    def __init__(self, task_params, address, username, password, max_in_flight=8, executor=None, **kwargs):
+        self._dispatch = MriServerDispatch(task_params, address, username, password, **kwargs)
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_in_flight)
+        # Created on first use, so it belongs to the loop the dispatch is used from
+        self._send_lock = None
+
+    @property
+    def report_id(self):
+        return self._dispatch.report_id
+
+    @property
+    def task_params(self):
+        return self._dispatch.task_params
+
+    async def setup_display(self, time_axis, attributes):
+        """Create a report for this dispatch, see MriServerDispatch.setup_display"""
+        return await self._run(self._dispatch.setup_display, time_axis, attributes)
+
+    async def train_event(self, event):
+        """Send a training event to the server, see MriServerDispatch.train_event"""
+        return await self._run(self._dispatch.train_event, event)
+
+    async def train_events(self, events, chunk_size=1000):
+        """Send many training events to the server, see MriServerDispatch.train_events"""
+        return await self._run(self._dispatch.train_events, events, chunk_size)
+
+    async def train_finish(self):
+        """Final call for training, see MriServerDispatch.train_finish"""
+        result = await self._run(self._dispatch.train_finish)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+        return result
+
+    async def _run(self, fn, *args):
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+        async with self._send_lock:
+            loop = _running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+
+# get_running_loop is only available from Python 3.7, before that get_event_loop returns the
+# running loop when called from a coroutine
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
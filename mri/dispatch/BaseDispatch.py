@@ -6,12 +6,15 @@ from future import standard_library
 standard_library.install_aliases()
 import logging
 
+from mri.event import EventBuffer, TrainingEvent
+
 
 class BaseDispatch(object):
     """Base class to dispatch new actions to whatever backend you want"""
     def __init__(self):
         self._time_axis = ''
         self._attributes = []
+        self._attribute_set = frozenset()
         self.setup = False
         pass
 
@@ -24,6 +27,7 @@ class BaseDispatch(object):
             raise ValueError('Attributes must contain the time-axis attribute')
         self._time_axis = time_axis
         self._attributes = attributes
+        self._attribute_set = frozenset(attributes)
         logging.debug('New display with time axis {0} and attributes {1}'.format(time_axis, attributes))
         self.setup = True
 
@@ -32,15 +36,92 @@ class BaseDispatch(object):
         logging.debug(event)
         if not self.setup:
             raise ValueError('Dispatch has not been setup -- call setup_display first')
+        self._check_event(event)
+
+    def train_events(self, events):
+        """Handle many training events at once, eg. when backfilling a run from its logs
+
+        Arguments
+        ---------
+        events : iterable
+            Any of an iterable of TrainingEvents, an EventBuffer, a dictionary mapping attribute
+            names to equal length sequences or NumPy arrays, a NumPy structured array, or a 2D
+            NumPy array whose columns are this dispatch's attributes in order
+
+        Returns
+        -------
+        count : int
+            Number of events handled
+        """
+        count = 0
+        for _ in self._iter_events(events):
+            count += 1
+        return count
 
+    def _check_event(self, event):
+        """Validate a single event against this dispatch"""
         if event.time_axis != self._time_axis:
             raise ValueError('Time-axis mismatch between dispatch and event')
 
-        event_set = set(event.attributes.keys())
-        dispatch_set = set(self._attributes)
-        if not event_set.intersection(dispatch_set):
+        if not any(key in self._attribute_set for key in event.attributes):
             raise ValueError('Events must contain at least one attribute present in this dispatch')
 
+    def _check_columns(self, names):
+        """Validate a whole set of columns against this dispatch at once"""
+        if self._time_axis not in names:
+            raise ValueError('Columns must contain the time-axis attribute')
+        unknown = set(names) - self._attribute_set
+        if unknown:
+            raise ValueError('Attributes {0} are not part of this dispatch'.format(sorted(unknown)))
+
+    def _iter_events(self, events):
+        """Turn any input accepted by `train_events` into validated TrainingEvents. Columnar
+        inputs are validated once up front rather than event by event"""
+        if not self.setup:
+            raise ValueError('Dispatch has not been setup -- call setup_display first')
+        if isinstance(events, EventBuffer):
+            if events.time_axis != self._time_axis:
+                raise ValueError('Time-axis mismatch between dispatch and buffer')
+            self._check_columns(events.attributes)
+            for event in events:
+                yield event
+            return
+        if getattr(events, 'dtype', None) is not None and events.dtype.names:
+            events = dict((name, events[name]) for name in events.dtype.names)
+        elif getattr(events, 'ndim', None) == 2:
+            events = dict((name, events[:, i]) for i, name in enumerate(self._attributes))
+        if isinstance(events, dict):
+            names = list(events)
+            self._check_columns(names)
+            columns = [events[n].tolist() if hasattr(events[n], 'tolist') else list(events[n]) for n in names]
+            if len(set(len(c) for c in columns)) > 1:
+                raise ValueError('Columns must all have the same length')
+            for row in zip(*columns):
+                # Drop missing values, whether None or NaN
+                attributes = dict((n, v) for n, v in zip(names, row) if v is not None and v == v)
+                yield TrainingEvent(attributes, self._time_axis)
+            return
+        for event in events:
+            self._check_event(event)
+            yield event
+
+    def new_buffer(self, typecodes=None):
+        """Create an EventBuffer with this dispatch's schema, for storing many events compactly
+
+        Arguments
+        ---------
+        typecodes : dict
+            Optional `array` typecode per attribute, see EventBuffer
+
+        Returns
+        -------
+        buffer : mri.event.EventBuffer
+            Empty buffer whose columns are this dispatch's attributes
+        """
+        if not self.setup:
+            raise ValueError('Dispatch has not been setup -- call setup_display first')
+        return EventBuffer(self._time_axis, self._attributes, typecodes)
+
     def train_finish(self):
         """Call once training is finished"""
         if not self.setup:
@@ -0,0 +1,103 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from builtins import super
+from future import standard_library
+standard_library.install_aliases()
+import logging
+
+from .BaseDispatch import BaseDispatch
+from mri.utilities import BatchSender
+
+
+class FanoutDispatch(BaseDispatch):
+    """Sends one stream of events to several dispatches. Each dispatch gets its own bounded
+    queue and worker thread, so a slow or failing backend adds no latency to the training loop
+    or to the other backends. Events are handed to each backend in batches via `train_events`.
+
+    Arguments
+    ---------
+    dispatches : list
+        Dispatches to send every event to
+
+    queue_size : int
+        Maximum number of events waiting for each backend
+
+    block : bool
+        Whether `train_event` waits for room when a backend's queue is full (True) or drops the
+        event for that backend (False). Unlike MriServerDispatch's `block_on_full`, this defaults
+        to False: a blocked `train_event` would hold up every other backend too, so by default one
+        stalled backend loses events rather than stalling training and the healthy backends
+
+    batch_size : int
+        Maximum number of events handed to a backend at once
+
+    linger : float
+        Maximum number of seconds an event waits for its batch to fill
+    """
+    def __init__(self, dispatches, queue_size=10000, block=False, batch_size=100, linger=0.05):
+        super().__init__()
+        self.dispatches = list(dispatches)
+        self._lane_args = (batch_size, linger, queue_size, block)
+        self._lanes = []
+
+    def setup_display(self, time_axis, attributes, *args, **kwargs):
+        """Set up every backend and start their workers
+
+        Returns
+        -------
+        results : list
+            Whatever each backend's setup_display returned, in order
+        """
+        super().setup_display(time_axis, attributes)
+        results = [d.setup_display(time_axis, attributes, *args, **kwargs) for d in self.dispatches]
+        self._lanes = [BatchSender(d.train_events, *self._lane_args) for d in self.dispatches]
+        return results
+
+    def train_event(self, event):
+        """Queue an event for every backend
+
+        Arguments
+        ---------
+        event : TrainingEvent.TrainingEvent
+            Event to send to all backends
+        """
+        super().train_event(event)
+        for lane in self._lanes:
+            lane.put(event)
+
+    def train_events(self, events):
+        """Queue many events for every backend"""
+        count = 0
+        for event in self._iter_events(events):
+            for lane in self._lanes:
+                lane.put(event)
+            count += 1
+        return count
+
+    def train_finish(self):
+        """Wait for every backend to receive its queued events, then finish each of them"""
+        super().train_finish()
+        for lane in self._lanes:
+            lane.close()
+        for dispatch in self.dispatches:
+            try:
+                dispatch.train_finish()
+            except Exception as ex:
+                logging.warning('Failed to finish {0}: {1}'.format(type(dispatch).__name__, ex))
+
+    def stats(self):
+        """Queue, delivery and drop counters for each backend
+
+        Returns
+        -------
+        stats : list
+            One dictionary per backend, in order, see BatchSender.stats
+        """
+        stats = []
+        for dispatch, lane in zip(self.dispatches, self._lanes):
+            lane_stats = lane.stats()
+            lane_stats['dispatch'] = type(dispatch).__name__
+            stats.append(lane_stats)
+        return stats
@@ -8,23 +8,93 @@ standard_library.install_aliases()
 import logging
 import os
 import errno
+import threading
+import time
 
 from .BaseDispatch import BaseDispatch
 
-try:
-    import matplotlib.pyplot as plt
-    import numpy as np
-    IMPORTED = True
-except Exception as e:
-    logging.warning('Failed to import numpy or matplotlib. Are you sure they are properly installed?')
-    logging.warning('You can ignore this warning if you do not plan to use Matplotlib')
-    logging.warning(e)
-    IMPORTED = False
+# Matplotlib and Numpy are slow to import, so they are only loaded once a MatplotlibDispatch is
+# created. IMPORTED is None until then. Figures are drawn with the object-oriented API on the Agg
+# canvas, pyplot is only loaded to show windows
+Figure = None
+FigureCanvasAgg = None
+np = None
+IMPORTED = None
+
+
+def _import_backend():
+    """Import Matplotlib and Numpy on first use, returns whether they are available"""
+    global Figure, FigureCanvasAgg, np, IMPORTED
+    if IMPORTED is None:
+        try:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            import numpy as np
+            IMPORTED = True
+        except Exception as e:
+            logging.warning('Failed to import numpy or matplotlib. Are you sure they are properly installed?')
+            logging.warning(e)
+            IMPORTED = False
+    return IMPORTED
+
+
+class _Series(object):
+    """Growable pair of NumPy buffers holding one attribute's (time, value) points, with a
+    running min and max so neither has to be recomputed over the whole history"""
+    def __init__(self, capacity=1024):
+        self._times = np.empty(capacity)
+        self._values = np.empty(capacity)
+        self.size = 0
+        self.min = None
+        self.max = None
+
+    def append(self, time_val, value):
+        if self.size == len(self._times):
+            self._times = np.resize(self._times, 2 * self.size)
+            self._values = np.resize(self._values, 2 * self.size)
+        value = np.nan if value is None else float(value)
+        self._times[self.size] = time_val
+        self._values[self.size] = value
+        self.size += 1
+        if value == value:
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def extend(self, times, values):
+        """Append many points at once"""
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        end = self.size + len(times)
+        if end > len(self._times):
+            capacity = max(end, 2 * len(self._times))
+            self._times = np.resize(self._times, capacity)
+            self._values = np.resize(self._values, capacity)
+        self._times[self.size:end] = times
+        self._values[self.size:end] = values
+        self.size = end
+        if len(values) and not np.isnan(values).all():
+            low, high = float(np.nanmin(values)), float(np.nanmax(values))
+            if self.min is None or low < self.min:
+                self.min = low
+            if self.max is None or high > self.max:
+                self.max = high
+
+    @property
+    def times(self):
+        return self._times[:self.size]
+
+    @property
+    def values(self):
+        return self._values[:self.size]
 
 
 class MatplotlibDispatch(BaseDispatch):
     """Display events via Matplotlib backend. This class requires some heavy dependencies, and so
-    trying to run it without Matplotlib and Numpy installed will result in pass-thru behavior
+    trying to run it without Matplotlib and Numpy installed will result in pass-thru behavior.
+    Each dispatch draws its own figure on an Agg canvas without touching pyplot's global state,
+    so any number of dispatches can plot at once
 
     Arguments
     ---------
@@ -33,14 +103,60 @@ class MatplotlibDispatch(BaseDispatch):
 
     img_folder : string
         Folder to save output images to
+
+    incremental : bool
+        If True, keep the data in growable NumPy buffers and update the existing plot lines in
+        place rather than re-plotting the whole history on every event
+
+    fps : float
+        In incremental or background mode, the maximum number of redraws per second
+
+    background : bool
+        If True, draw the figure in a background thread. `train_event` then only records the
+        event, and redraws requested while the thread is busy are merged into one
+
+    snapshot_every : int
+        Save the image every `snapshot_every` events, rather than only at `train_finish`
+
+    snapshot_interval : float
+        Save the image at most every `snapshot_interval` seconds while events arrive
+
+    save_data : bool
+        Also save the plotted series next to the image as `<image>.npz` whenever it is saved
+
+    resume : bool
+        If True and a series file saved with `save_data` exists, load it in `setup_display` so
+        plotting continues where the earlier run stopped
     """
-    def __init__(self, task_params, img_folder):
+    def __init__(self, task_params, img_folder, incremental=False, fps=10, background=False,
+                 snapshot_every=None, snapshot_interval=None, save_data=False, resume=False):
         super().__init__()
-        # Data will be a dictionary of lists
+        _import_backend()
+        # Data will be a dictionary of lists, or of _Series in incremental mode
         self._data = {}
         self.task_params = task_params
         self._img_folder = img_folder
         self._legend_keys = []
+        self.incremental = incremental
+        self.fps = fps
+        self.background = background
+        self._figure = None
+        self._pyplot = None
+        self._lines = None
+        self._axes = None
+        self._legend = None
+        self._last_draw = 0
+        # Guards _data between train_event and the render thread
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.save_data = save_data
+        self.resume = resume
+        self._unsaved = 0
+        self._last_snapshot = time.time()
 
     def setup_display(self, time_axis, attributes, show_windows=False):
         if IMPORTED:
@@ -48,12 +164,28 @@ class MatplotlibDispatch(BaseDispatch):
             # Setup data
             for item in self._attributes:
                 if item != self._time_axis:
-                    self._data[item] = []
+                    self._data[item] = _Series() if self.incremental else []
+            if self.resume and os.path.exists(self._data_path()):
+                self._load_data(self._data_path())
             # Setup plotting
-            plt.figure(figsize=(12, 10))
+            self._lines = None
             if show_windows:
+                import matplotlib.pyplot as plt
+                self._pyplot = plt
+                self._figure = plt.figure(figsize=(12, 10))
                 plt.ion()
                 plt.show()
+            else:
+                self._figure = Figure(figsize=(12, 10))
+                FigureCanvasAgg(self._figure)
+            if self.background:
+                if show_windows:
+                    logging.warning('Windows must be drawn on the main thread, not drawing in the background')
+                else:
+                    self._stop.clear()
+                    self._worker = threading.Thread(target=self._render_loop, name='MatplotlibDispatch')
+                    self._worker.daemon = True
+                    self._worker.start()
         else:
             logging.error('You need Matplotlib and Numpy to run the MatplotlibDispatch, please install them')
 
@@ -67,67 +199,236 @@ class MatplotlibDispatch(BaseDispatch):
         """
         if IMPORTED:
             super().train_event(event)
+            with self._lock:
+                self._add_event(event)
+                self._unsaved += 1
+            if self._worker is not None:
+                self._dirty.set()
+                return
+            if not self.incremental or time.time() - self._last_draw >= 1.0 / self.fps:
+                self._render()
+            if self._snapshot_due():
+                self._write_snapshot()
+        else:
+            logging.error('Improper requirements, skipping train event')
 
-            time = event.attributes[event.time_axis]
-            for item in event.attributes:
-                if item != event.time_axis:
-                    val = event.attributes[item]
-                    self._data[item].append([time, val])
+    def train_events(self, events):
+        """Add many events to the plot at once, redrawing only after all of them are added
 
-            # Convert to numpy arrays
-            np_data = []
-            mins = {}
-            maxes = {}
-            for key in self._data:
-                if self._data[key]:
-                    data = np.array(self._data[key])
-                    mins[key] = np.min(data, axis=0)[1]
-                    maxes[key] = np.max(data, axis=0)[1]
-                    np_data.append(data[:, 0])
-                    np_data.append(data[:, 1])
-
-            plt.clf()
-            plt.plot(*np_data)
-            self._legend_keys = []
-            for k in self._data.keys():
-                text = "{} (".format(k.title())
-                if k in maxes:
-                    text += "Max: {:0.4f} ".format(float(maxes[k]))
-                if k in mins:
-                    text += "Min: {:0.4f}".format(float(mins[k]))
-                text += ")"
-                self._legend_keys.append(text)
-
-            ax = plt.gca()
+        Arguments
+        ---------
+        events : iterable
+            Events in any form accepted by BaseDispatch.train_events
+
+        Returns
+        -------
+        count : int
+            Number of events added
+        """
+        if not IMPORTED:
+            logging.error('Improper requirements, skipping train events')
+            return 0
+        count = 0
+        with self._lock:
+            for event in self._iter_events(events):
+                self._add_event(event)
+                count += 1
+            self._unsaved += count
+        if self._worker is not None:
+            self._dirty.set()
+            return count
+        self._render()
+        if self._snapshot_due():
+            self._write_snapshot()
+        return count
+
+    def _render_loop(self):
+        """Redraw the figure whenever new events arrive, at most `fps` times per second"""
+        while True:
+            self._dirty.wait()
+            if self._stop.is_set():
+                return
+            self._dirty.clear()
+            try:
+                self._render()
+                if self._snapshot_due():
+                    self._write_snapshot()
+            except Exception:
+                logging.exception('Failed to draw figure for \'{}\''.format(self.task_params['title']))
+            self._stop.wait(1.0 / self.fps)
+
+    def _render(self):
+        """Update the figure with a snapshot of the data"""
+        with self._lock:
+            snapshot = self._series_data()
+        if self.incremental:
+            self._redraw(snapshot)
+        else:
+            self._replot(snapshot)
+        self._last_draw = time.time()
+
+    def _series_data(self):
+        """List the (key, times, values, min, max) of every attribute. Arrays are copied when
+        drawing in the background so the next events can be added while the figure is drawn"""
+        copy = self._worker is not None
+        snapshot = []
+        for key in self._data:
+            if self.incremental:
+                series = self._data[key]
+                times, values = series.times, series.values
+                if copy:
+                    times, values = times.copy(), values.copy()
+                snapshot.append((key, times, values, series.min, series.max))
+            elif self._data[key]:
+                data = np.array(self._data[key])
+                snapshot.append((key, data[:, 0], data[:, 1],
+                                 np.min(data, axis=0)[1], np.max(data, axis=0)[1]))
+            else:
+                snapshot.append((key, None, None, None, None))
+        return snapshot
+
+    def _replot(self, snapshot):
+        """Clear the figure and plot the whole history again"""
+        np_data = []
+        for key, times, values, _, _ in snapshot:
+            if times is not None:
+                np_data.append(times)
+                np_data.append(values)
+
+        fig = self._figure
+        fig.clf()
+        ax = fig.add_subplot(111)
+        ax.plot(*np_data)
+        self._legend_keys = [self._legend_text(key, low, high) for key, _, _, low, high in snapshot]
+
+        box = ax.get_position()
+        ax.set_position([box.x0, box.y0 + box.height * 0.1,
+                         box.width, box.height*0.9])
+        ax.legend(self._legend_keys,
+                  bbox_to_anchor=(0.5, -0.05),
+                  loc='upper center',
+                  ncol=2,
+                  borderaxespad=0.)
+        ax.set_title(self.task_params['title'])
+        ax.grid(True, which='both')
+        fig.canvas.draw_idle()
+
+    def _add_event(self, event):
+        """Append an event's values to the stored data"""
+        time_val = event.attributes[event.time_axis]
+        for item in event.attributes:
+            if item != event.time_axis:
+                if self.incremental:
+                    self._data[item].append(time_val, event.attributes[item])
+                else:
+                    self._data[item].append([time_val, event.attributes[item]])
+
+    @staticmethod
+    def _legend_text(key, low, high):
+        text = "{} (".format(key.title())
+        if high is not None:
+            text += "Max: {:0.4f} ".format(float(high))
+        if low is not None:
+            text += "Min: {:0.4f}".format(float(low))
+        return text + ")"
+
+    def _redraw(self, snapshot):
+        """Push the incremental buffers to the existing plot lines, creating them on first use"""
+        fig = self._figure
+        if self._lines is None:
+            ax = self._axes = fig.add_subplot(111)
             box = ax.get_position()
             ax.set_position([box.x0, box.y0 + box.height * 0.1,
                              box.width, box.height*0.9])
-            plt.legend(self._legend_keys,
-                       bbox_to_anchor=(0.5, -0.05),
-                       loc='upper center',
-                       ncol=2,
-                       borderaxespad=0.)
-            plt.title(self.task_params['title'])
-            plt.grid(True, which='both')
-            plt.draw()
-        else:
-            logging.error('Improper requirements, skipping train event')
+            self._lines = {}
+            for key in self._data:
+                self._lines[key], = ax.plot([], [])
+            self._legend = ax.legend([self._lines[k] for k in self._data],
+                                     [self._legend_text(k, None, None) for k in self._data],
+                                     bbox_to_anchor=(0.5, -0.05),
+                                     loc='upper center',
+                                     ncol=2,
+                                     borderaxespad=0.)
+            ax.set_title(self.task_params['title'])
+            ax.grid(True, which='both')
+        ax = self._axes
+        self._legend_keys = []
+        for (key, times, values, low, high), text in zip(snapshot, self._legend.get_texts()):
+            self._lines[key].set_data(times, values)
+            self._legend_keys.append(self._legend_text(key, low, high))
+            text.set_text(self._legend_keys[-1])
+        ax.relim()
+        ax.autoscale_view()
+        fig.canvas.draw_idle()
+
+    def _image_path(self):
+        return os.path.join(self._img_folder, self.task_params['title'].replace(' ', '_'))
+
+    def _data_path(self):
+        return self._image_path() + '.npz'
+
+    def _snapshot_due(self):
+        """Whether enough events or time have passed since the image was last saved"""
+        if not self._unsaved:
+            return False
+        if self.snapshot_every and self._unsaved >= self.snapshot_every:
+            return True
+        return bool(self.snapshot_interval) and time.time() - self._last_snapshot >= self.snapshot_interval
+
+    def _write_snapshot(self):
+        """Save the image, and the series if `save_data` is set. Each file is written next to its
+        final path and renamed over it, so a crash never leaves a partly written file behind"""
+        try:
+            logging.info("Creating folder {}".format(self._img_folder))
+            os.makedirs(self._img_folder)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        with self._lock:
+            self._unsaved = 0
+            series = self._series_data() if self.save_data else None
+        self._last_snapshot = time.time()
+        save_path = self._image_path()
+        self._figure.savefig(save_path + '.tmp', bbox_inches='tight', format='png')
+        getattr(os, 'replace', os.rename)(save_path + '.tmp', save_path)
+        if series is not None:
+            arrays = {}
+            for key, times, values, _, _ in series:
+                if times is not None:
+                    arrays['times:' + key] = np.asarray(times, dtype=float)
+                    arrays['values:' + key] = np.asarray(values, dtype=float)
+            data_path = self._data_path()
+            with open(data_path + '.tmp', 'wb') as f:
+                np.savez(f, **arrays)
+            getattr(os, 'replace', os.rename)(data_path + '.tmp', data_path)
+
+    def _load_data(self, path):
+        """Load the series saved by `_write_snapshot` for the attributes of this display"""
+        logging.info('Resuming plot from {0}'.format(path))
+        with np.load(path) as saved:
+            for key in self._data:
+                if 'times:' + key not in saved:
+                    continue
+                times, values = saved['times:' + key], saved['values:' + key]
+                if self.incremental:
+                    self._data[key].extend(times, values)
+                else:
+                    self._data[key].extend(np.column_stack((times, values)).tolist())
 
     def train_finish(self):
         """Save our output figure to PNG format, as defined by the save path `img_folder`"""
         if IMPORTED:
-            filename = self.task_params['title'].replace(' ', '_')
-            save_path = os.path.join(self._img_folder, filename)
-            logging.info('Finished training! Saving output image to {0}'.format(save_path))
+            if self._worker is not None:
+                self._stop.set()
+                self._dirty.set()
+                self._worker.join()
+                self._worker = None
+            if self.incremental or self.background:
+                self._render()
+            logging.info('Finished training! Saving output image to {0}'.format(self._image_path()))
             logging.info('\'{}\' Final Extremes: {}'.format(self.task_params['title'], self._legend_keys))
-            try:
-                fold = os.path.basename(self._img_folder)
-                logging.info("Creating folder {}".format(fold))
-                os.makedirs(fold)
-            except OSError as e:
-                if e.errno != errno.EEXIST:
-                    raise
-            plt.savefig(save_path, bbox_inches='tight', format='png')
-            plt.close()
+            self._write_snapshot()
+            if self._pyplot is not None:
+                self._pyplot.close(self._figure)
         else:
             logging.error('Improper requirements, skipping train finish')
@@ -7,9 +7,14 @@ from future import standard_library
 standard_library.install_aliases()
 import requests
 import json
+import logging
+import os
+import threading
+import time
 
 from .BaseDispatch import BaseDispatch
-from mri.utilities import ServerConsts, send_request
+from mri.utilities import ServerConsts, BatchSender, ClientMetrics, ReportIndex, SessionPool, Spool, send_request
+from mri.utilities import wire_format
 
 
 class MriServerDispatch(BaseDispatch):
@@ -34,15 +39,98 @@ class MriServerDispatch(BaseDispatch):
 
     password : string
         Password for the mri-server
+
+    asynchronous : bool
+        If True, `train_event` queues events and returns immediately while a background worker
+        sends them to the server in batches
+
+    batch_size : int
+        Maximum number of events per request in asynchronous mode
+
+    linger : float
+        Maximum number of seconds an event waits for its batch to fill in asynchronous mode
+
+    queue_size : int
+        Maximum number of events waiting to be sent in asynchronous mode, 0 for unbounded
+
+    block_on_full : bool
+        In asynchronous mode, whether `train_event` waits for room when the queue is full (True)
+        or drops the event (False)
+
+    pool : mri.utilities.SessionPool
+        Pool of persistent sessions to send requests with, defaults to the shared pool
+
+    spool_folder : string
+        Folder to spool events to when they can't be sent. Spooled events can be sent later
+        with MriServer.replay_spool
+
+    offline : bool
+        If True, don't contact the server at all and write every event to the spool
+
+    columnar : bool
+        Send batches of events in the columnar layout, see `mri.utilities.wire_format`
+
+    compression : string
+        Compress batches of events with 'gzip' or 'deflate'. If the server rejects the compact
+        encoding with 415 Unsupported Media Type, the dispatch falls back to plain JSON
+
+    timeout : tuple
+        (connect, read) timeouts in seconds for every request
+
+    retries : int
+        Number of retries for the request formatting the report. Creating the report is a POST
+        and is not retried, since a retry could create a second report. Events are never retried
+        either, since a server that is down trips the shared circuit breaker and events are
+        spooled instead
+
+    metrics : mri.utilities.ClientMetrics
+        Metrics to record requests, event counts and time spent in `train_event` in. Defaults to
+        a new ClientMetrics for this dispatch, available as `metrics`
+
+    report_id : string
+        ID of an existing report to append to. `setup_display` then reuses the report and its
+        visualization instead of creating new ones, see MriServer.resume_dispatch
+
+    resume_after : float
+        Skip events whose time axis value is not greater than `resume_after`, eg. the last
+        iteration a preempted run already sent
     """
-    def __init__(self, task_params, address, username, password):
+    _RUNTIME_FIELDS = ('metrics', 'pool', '_sender', '_spool', '_setup_thread', '_setup_result', '_report_lock')
+
+    def __init__(self, task_params, address, username, password, asynchronous=False, batch_size=100,
+                 linger=0.5, queue_size=10000, block_on_full=True, pool=None, spool_folder=None,
+                 offline=False, columnar=False, compression=None, timeout=ServerConsts.TIMEOUT, retries=2,
+                 metrics=None, report_id=None, resume_after=None):
         super().__init__()
+        self.metrics = metrics if metrics is not None else ClientMetrics()
+        self.timeout = timeout
+        self.retries = retries
+        if offline and spool_folder is None:
+            raise ValueError('Offline mode requires a spool folder')
+        if compression is not None and compression not in wire_format.COMPRESSIONS:
+            raise ValueError('Unknown compression {0}'.format(compression))
+        self.columnar = columnar
+        self.compression = compression
         self.task_params = task_params
         self.address = address
         self.auth = (username, password)
-        self.report_id = None
+        self.pool = pool if pool is not None else SessionPool.default()
+        # The report ID may be set by the background setup thread
+        self._report_lock = threading.Lock()
+        self.report_id = report_id
+        self.resume_after = resume_after
+        self.offline = offline
+        self._spool_folder = spool_folder
+        self._spool = None
+        self._sender = None
+        self._setup_thread = None
+        self._setup_result = None
+        # Cleared if the server turns out to only take one event per request
+        self._batch_events = True
+        if asynchronous:
+            self._sender = BatchSender(self._send_queued, batch_size, linger, queue_size, block_on_full)
 
-    def setup_display(self, time_axis, attributes):
+    def setup_display(self, time_axis, attributes, background=False):
         """Create a report for this dispatch, usually done at init
 
         Arguments
@@ -54,19 +142,72 @@ class MriServerDispatch(BaseDispatch):
             List of strings representing attributes to plot eg. loss, accuracy,
             learning rate, etc. If time_axis attribute is present it will be ignored.
 
+        background : bool
+            If True, create and configure the report in a background thread and return at once.
+            Events can be sent right away, since they don't refer to the report. Use `wait_setup`
+            to wait for the report
+
         Returns
         -------
         result : requests.Response
-            Result of the report creation request
+            Result of the report creation request, None in offline mode, when resuming a report
+            or when setting up in the background
         """
         super().setup_display(time_axis, attributes)
+        if self.offline or self.report_id is not None:
+            return None
+        if background:
+            self._setup_thread = threading.Thread(target=self._setup_report, name='MriServerDispatch setup')
+            self._setup_thread.daemon = True
+            self._setup_thread.start()
+            return None
+        return self._setup_report()
+
+    def wait_setup(self, timeout=None):
+        """Wait for a background `setup_display` to finish
+
+        Arguments
+        ---------
+        timeout : float
+            Maximum number of seconds to wait, None to wait until done
+
+        Returns
+        -------
+        result : requests.Response
+            Result of the report creation request, None if it isn't done or failed
+        """
+        if self._setup_thread is not None:
+            self._setup_thread.join(timeout)
+            if self._setup_thread.is_alive():
+                return None
+        return self._setup_result
+
+    @property
+    def report_id(self):
+        """ID of this dispatch's report. After a background `setup_display` it stays None until
+        the report has been created, see `wait_setup`"""
+        with self._report_lock:
+            return self._report_id
+
+    @report_id.setter
+    def report_id(self, report_id):
+        with self._report_lock:
+            self._report_id = report_id
+
+    def _setup_report(self):
+        """Create the report and its visualization, see setup_display"""
         report_json = self._new_report()
         if 'id' in report_json:
             self.report_id = report_json['id']
+            ReportIndex.notify_created(self.address, report_json['id'], self.task_params['title'])
         elif 'data' in report_json:
             # This is for unit testing
             self.report_id = ''
-        return self._format_report()
+        else:
+            logging.warning('Could not create a report, events will still be sent or spooled')
+            return None
+        self._setup_result = self._format_report()
+        return self._setup_result
 
     def train_event(self, event):
         """Dispatch training events to the mri-server via REST interface
@@ -82,23 +223,155 @@ class MriServerDispatch(BaseDispatch):
         Returns
         -------
         result : requests.Response
-            Result of the training event request
+            Result of the training event request, None in asynchronous or offline mode, if the
+            event was skipped because of `resume_after` or if it could not be sent
         """
-        super().train_event(event)
-        payload = self._format_train_request(event)
-        result = self._send_request(ServerConsts.API_URL.EVENT, 'POST', payload)
-        return result
+        start = time.time()
+        try:
+            super().train_event(event)
+            if self._skip(event):
+                return None
+            payload = self._train_payload(event)
+            if self._sender is not None:
+                self._queue_payload(payload)
+                return None
+            if self.offline:
+                self._spool_payloads([payload])
+                return None
+            result = self._send_request(ServerConsts.API_URL.EVENT, 'POST', json.dumps(payload))
+            self._account(result, [payload])
+            return result
+        finally:
+            self.metrics.record_time('train_event', time.time() - start)
+
+    def train_events(self, events, chunk_size=1000):
+        """Dispatch many training events at once, sending them in chunks of `chunk_size` events
+        per request. In asynchronous mode the events are queued for the background worker instead
+
+        Arguments
+        ---------
+        events : iterable
+            Events in any form accepted by BaseDispatch.train_events
+
+        chunk_size : int
+            Maximum number of events per request
+
+        Returns
+        -------
+        count : int
+            Number of events dispatched, not counting events skipped because of `resume_after`
+        """
+        count = 0
+        chunk = []
+        for event in self._iter_events(events):
+            if self._skip(event):
+                continue
+            payload = self._train_payload(event)
+            count += 1
+            if self._sender is not None:
+                self._queue_payload(payload)
+                continue
+            chunk.append(payload)
+            if len(chunk) >= chunk_size:
+                self._send_batch(chunk)
+                chunk = []
+        if chunk:
+            self._send_batch(chunk)
+        return count
 
     def train_finish(self):
-        """Final call for training, can be used to issue alerts/etc. Currently unused."""
-        pass
+        """Final call for training. In asynchronous mode this sends any queued events and stops
+        the background worker. Any spooled events are flushed to disk, and a report still being
+        set up in the background is waited for"""
+        self.wait_setup()
+        if self._sender is not None:
+            self._sender.close()
+        if self._spool is not None:
+            self._spool.close()
+
+    def _send_batch(self, payloads):
+        """Send a list of event payloads to the server in a single request. If the server refuses
+        lists of events, they are sent one per request from then on"""
+        if self.offline:
+            self._spool_payloads(payloads)
+            return None
+        if not self._batch_events:
+            return self._send_each(payloads)
+        body, headers = wire_format.encode_batch(payloads, self.columnar, self.compression)
+        result = self._send_request(ServerConsts.API_URL.EVENT, 'POST', body, headers)
+        if result is not None and result.status_code == 415 and (self.columnar or self.compression):
+            logging.warning('Server does not accept compact event batches, falling back to plain JSON')
+            self.columnar = False
+            self.compression = None
+            return self._send_batch(payloads)
+        if result is not None and 400 <= result.status_code < 500:
+            logging.warning('Server does not accept batches of events, sending them one by one')
+            self._batch_events = False
+            return self._send_each(payloads)
+        self._account(result, payloads)
+        return result
+
+    def _send_each(self, payloads):
+        """Send event payloads one per request, returning the first failed response, or the last
+        response if all of them were sent"""
+        failed = result = None
+        for payload in payloads:
+            result = self._send_request(ServerConsts.API_URL.EVENT, 'POST', json.dumps(payload))
+            self._account(result, [payload])
+            if failed is None and (result is None or not 200 <= result.status_code < 300):
+                failed = result
+        return failed if failed is not None else result
+
+    def _skip(self, event):
+        """Whether an event was already sent by the run being resumed"""
+        if self.resume_after is None or event.attributes[event.time_axis] > self.resume_after:
+            return False
+        self.metrics.count_events('skipped')
+        return True
+
+    def _send_queued(self, payloads):
+        """Send a batch for the background worker, returning whether the server accepted it.
+        Batches spooled in offline mode count as handled"""
+        result = self._send_batch(payloads)
+        return self.offline or (result is not None and 200 <= result.status_code < 300)
 
-    def _send_request(self, suffix, protocol, data):
+    def _queue_payload(self, payload):
+        """Hand an event payload to the background worker"""
+        if self._sender.put(payload):
+            self.metrics.count_events('queued')
+        else:
+            self.metrics.count_events('dropped')
+
+    def _account(self, result, payloads):
+        """Count sent events, and spool them if they could not be sent. Events the server refused
+        with a client error are dropped, since sending them again would fail the same way"""
+        if result is None or result.status_code >= 500:
+            self._spool_payloads(payloads)
+        elif 200 <= result.status_code < 300:
+            self.metrics.count_events('sent', len(payloads))
+        else:
+            logging.warning('Server refused {0} events with {1}, dropping them'.format(
+                len(payloads), result.status_code))
+            self.metrics.count_events('dropped', len(payloads))
+
+    def _spool_payloads(self, payloads):
+        """Keep event payloads that couldn't be sent in this dispatch's spool, if it has one"""
+        if self._spool_folder is None:
+            self.metrics.count_events('dropped', len(payloads))
+            return
+        self.metrics.count_events('spooled', len(payloads))
+        if self._spool is None:
+            filename = '{0}.spool'.format(self._train_payload_type())
+            self._spool = Spool(os.path.join(self._spool_folder, filename))
+        self._spool.extend(payloads)
+
+    def _send_request(self, suffix, protocol, data, headers=None):
         """Send a report via HTTP, but allow for non-responsive or dead servers. Fill
         in information from the class to reduce the burden on the caller."""
         url = requests.compat.urljoin(self.address, suffix)
         auth = self.auth
-        return send_request(url, protocol, data, auth)
+        return send_request(url, protocol, data, auth, self.pool.get_session(self.address), headers,
+                            self.timeout, self.retries, metrics=self.metrics, limit_key=self.task_params.get('id'))
 
     def _format_report(self):
         """Called after creating a new report, formats a report to display mri events"""
@@ -106,8 +379,7 @@ class MriServerDispatch(BaseDispatch):
             raise ValueError('Dispatch not setup yet, please call setup_report')
         full_url = requests.compat.urljoin(ServerConsts.API_URL.REPORT_ID, self.report_id)
         # Compile fields, etc
-        attr_no_time = self._attributes
-        attr_no_time.remove(self._time_axis)
+        attr_no_time = [a for a in self._attributes if a != self._time_axis]
         fields = ','.join(attr_no_time)
         scales = ','.join(['auto'] * len(attr_no_time))
         sample = self._time_axis
@@ -137,19 +409,35 @@ class MriServerDispatch(BaseDispatch):
     def _new_report(self):
         """Called during init, creates a new report on the server and returns its ID"""
         payload = json.dumps({'title': self.task_params['title']})
-        result = self._send_request(ServerConsts.API_URL.REPORT, 'POST', payload).text
-        result_obj = json.loads(result)
+        result = self._send_request(ServerConsts.API_URL.REPORT, 'POST', payload)
+        if result is None:
+            return {}
+        result_obj = json.loads(result.text)
         return result_obj
 
     def _format_train_request(self, train_event):
         """Generate the payload for the train request"""
-        event_type = 'train.{0}'.format(self.task_params['id'].replace(' ', ''))
+        return json.dumps(self._train_payload(train_event))
+
+    def _train_payload(self, train_event):
+        """Generate the event object sent to the server for a train event"""
         properties = train_event.attributes
-        payload = {
-            'type': event_type,
+        return {
+            'type': self._train_payload_type(),
             'properties': properties
         }
-        return json.dumps(payload)
+
+    def _train_payload_type(self):
+        """Event type of this dispatch's train events"""
+        return 'train.{0}'.format(self.task_params['id'].replace(' ', ''))
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
\ No newline at end of file
+        # Shared resources and background state don't make two dispatches different
+        mine, theirs = dict(self.__dict__), dict(other.__dict__)
+        for name in self._RUNTIME_FIELDS:
+            mine.pop(name, None)
+            theirs.pop(name, None)
+        return mine == theirs
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
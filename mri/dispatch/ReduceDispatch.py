@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from builtins import super
+from future import standard_library
+standard_library.install_aliases()
+
+from .BaseDispatch import BaseDispatch
+from mri.event import TrainingEvent
+
+
+class ReduceDispatch(BaseDispatch):
+    """Wraps another dispatch and thins out its events before they reach it, so metrics can be
+    logged at full rate while only a bounded number of points is sent. Each attribute is reduced
+    independently by its own reducer from `mri.utilities.reducers`; attributes without a
+    reducer are passed through untouched.
+
+    Arguments
+    ---------
+    dispatch : BaseDispatch
+        Dispatch that receives the reduced events
+
+    reducers : dict
+        Reducer instance per attribute name, eg. {'loss': LTTB(100), 'lr': EveryNth(1000)}
+    """
+    def __init__(self, dispatch, reducers):
+        super().__init__()
+        self.dispatch = dispatch
+        self.reducers = reducers
+
+    def setup_display(self, time_axis, attributes, *args, **kwargs):
+        """Set up this dispatch and the wrapped one, returning whatever the wrapped one returns"""
+        super().setup_display(time_axis, attributes)
+        return self.dispatch.setup_display(time_axis, attributes, *args, **kwargs)
+
+    def train_event(self, event):
+        """Feed an event through the reducers and pass any resulting events on
+
+        Arguments
+        ---------
+        event : TrainingEvent.TrainingEvent
+            Event to reduce
+        """
+        super().train_event(event)
+        for reduced in self._reduce([event]):
+            self.dispatch.train_event(reduced)
+
+    def train_events(self, events):
+        """Feed many events through the reducers and pass the results on in a single call"""
+        return self.dispatch.train_events(self._reduce(self._iter_events(events)))
+
+    def train_finish(self):
+        """Flush points held back by the reducers, then finish the wrapped dispatch"""
+        super().train_finish()
+        grouped = {}
+        for name, reducer in self.reducers.items():
+            for time_val, value in reducer.flush():
+                grouped.setdefault(time_val, {})[name] = value
+        events = self._to_events(grouped)
+        if events:
+            self.dispatch.train_events(events)
+        return self.dispatch.train_finish()
+
+    def _reduce(self, events):
+        """Reduce `events`, returning the events to pass on ordered by time"""
+        grouped = {}
+        for event in events:
+            time_val = event.attributes[event.time_axis]
+            for name, value in event.attributes.items():
+                if name == event.time_axis:
+                    continue
+                reducer = self.reducers.get(name)
+                if reducer is None:
+                    grouped.setdefault(time_val, {})[name] = value
+                    continue
+                for point_time, point_value in reducer.push(time_val, value):
+                    grouped.setdefault(point_time, {})[name] = point_value
+        return self._to_events(grouped)
+
+    def _to_events(self, grouped):
+        events = []
+        for time_val in sorted(grouped):
+            attributes = grouped[time_val]
+            attributes[self._time_axis] = time_val
+            events.append(TrainingEvent(attributes, self._time_axis))
+        return events
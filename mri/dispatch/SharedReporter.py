@@ -0,0 +1,173 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from builtins import super
+from future import standard_library
+standard_library.install_aliases()
+import logging
+import multiprocessing
+import threading
+
+from .BaseDispatch import BaseDispatch
+from mri.event import TrainingEvent
+
+
+class ReporterClient(BaseDispatch):
+    """Dispatch used by a worker process of a SharedReporter. Events are validated locally and
+    pushed over a pipe to the reporter's process, which owns the real dispatch. Clients are
+    handed to worker processes as arguments when the workers are started
+
+    Arguments
+    ---------
+    queue : multiprocessing.Queue
+        Queue shared with the reporter
+
+    rank : int
+        Index of this worker
+
+    time_axis : string
+        Time axis of the reporter's dispatch
+
+    attributes : list
+        Attributes of the reporter's dispatch
+    """
+    def __init__(self, queue, rank, time_axis, attributes):
+        super().__init__()
+        self.rank = rank
+        self._queue = queue
+        BaseDispatch.setup_display(self, time_axis, attributes)
+
+    def setup_display(self, time_axis, attributes):
+        raise ValueError('Reporter clients are set up by their SharedReporter')
+
+    def train_event(self, event):
+        """Send an event to the reporter"""
+        super().train_event(event)
+        self._queue.put(('event', self.rank, event.attributes))
+
+    def train_events(self, events):
+        """Send many events to the reporter"""
+        count = 0
+        for event in self._iter_events(events):
+            self._queue.put(('event', self.rank, event.attributes))
+            count += 1
+        return count
+
+    def train_finish(self):
+        """Tell the reporter this worker is done"""
+        super().train_finish()
+        self._queue.put(('finish', self.rank, None))
+
+
+class SharedReporter(object):
+    """Lets the worker processes of a data-parallel job report through one dispatch, so the job
+    produces one report and one stream of events instead of one per worker. Workers send events
+    through ReporterClients obtained from `client`; a thread in the process that created the
+    reporter receives them and forwards them to the dispatch.
+
+    With `reduce` set, events are grouped by time-axis value and one event per step is sent once
+    every worker has reported that step, holding the mean or sum of each attribute across
+    workers.
+
+    Arguments
+    ---------
+    dispatch : BaseDispatch
+        Dispatch that receives the events, owned by this process
+
+    world_size : int
+        Number of worker processes
+
+    reduce : string
+        None to forward every event, or 'mean' or 'sum' to combine each step across workers
+
+    context : multiprocessing context
+        Context to create the pipe with, defaults to the default multiprocessing context
+    """
+    _REDUCERS = {
+        'mean': lambda values: sum(values) / len(values),
+        'sum': sum
+    }
+
+    def __init__(self, dispatch, world_size=1, reduce=None, context=None):
+        if reduce is not None and reduce not in self._REDUCERS:
+            raise ValueError('Unknown reduction {0}'.format(reduce))
+        self.dispatch = dispatch
+        self.world_size = world_size
+        self.reduce = reduce
+        self._queue = (context or multiprocessing).Queue()
+        self._pending = {}
+        self._finished = set()
+        self._thread = None
+
+    def setup_display(self, time_axis, attributes, *args, **kwargs):
+        """Set up the dispatch and start receiving events from workers"""
+        result = self.dispatch.setup_display(time_axis, attributes, *args, **kwargs)
+        self._thread = threading.Thread(target=self._run, name='mri-shared-reporter')
+        self._thread.daemon = True
+        self._thread.start()
+        return result
+
+    def client(self, rank):
+        """Create the ReporterClient for worker `rank`"""
+        if self._thread is None:
+            raise ValueError('Reporter has not been setup -- call setup_display first')
+        return ReporterClient(self._queue, rank, self.dispatch._time_axis, list(self.dispatch._attributes))
+
+    def wait(self, timeout=None):
+        """Wait until every worker has called train_finish on its client"""
+        self._thread.join(timeout)
+
+    def train_finish(self, timeout=60):
+        """Wait for the workers to finish, send any incomplete steps and finish the dispatch
+
+        Arguments
+        ---------
+        timeout : float
+            Maximum number of seconds to wait for the workers, None to wait forever. A worker that
+            died without calling train_finish would otherwise keep the reporter waiting
+        """
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logging.warning('Not every worker finished, stopping the reporter anyway')
+            self._queue.put(('stop', None, None))
+            self._thread.join()
+        for time_val in sorted(self._pending):
+            try:
+                self._send_step(time_val)
+            except Exception as ex:
+                logging.warning('Failed to dispatch step {0}: {1}'.format(time_val, ex))
+        return self.dispatch.train_finish()
+
+    def _run(self):
+        time_axis = self.dispatch._time_axis
+        while len(self._finished) < self.world_size:
+            kind, rank, attributes = self._queue.get()
+            if kind == 'stop':
+                break
+            if kind == 'finish':
+                self._finished.add(rank)
+                continue
+            try:
+                if self.reduce is None:
+                    self.dispatch.train_event(TrainingEvent(attributes, time_axis))
+                    continue
+                step = self._pending.setdefault(attributes[time_axis], {})
+                step[rank] = attributes
+                if len(step) == self.world_size:
+                    self._send_step(attributes[time_axis])
+            except Exception as ex:
+                logging.warning('Failed to dispatch event from worker {0}: {1}'.format(rank, ex))
+
+    def _send_step(self, time_val):
+        """Combine one step's events from every worker into a single event and dispatch it"""
+        time_axis = self.dispatch._time_axis
+        combine = self._REDUCERS[self.reduce]
+        values = {}
+        for attributes in self._pending.pop(time_val).values():
+            for name, value in attributes.items():
+                if name != time_axis and value is not None:
+                    values.setdefault(name, []).append(value)
+        combined = dict((name, combine(v)) for name, v in values.items())
+        combined[time_axis] = time_val
+        self.dispatch.train_event(TrainingEvent(combined, time_axis))
@@ -0,0 +1,81 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from builtins import super
+from future import standard_library
+standard_library.install_aliases()
+
+from .BaseDispatch import BaseDispatch
+from mri.utilities import EventStore
+
+
+class SqliteDispatch(BaseDispatch):
+    """Keep events in a local SQLite file instead of sending them anywhere, eg. on nodes that
+    can't reach a server. Each task is stored as a report under its ID, and can be read back as
+    NumPy arrays with `query` while training is still running.
+
+    Arguments
+    ---------
+    task_params : dict
+        Dictionary of the task json specification, including title and ID number
+
+    path : string
+        Database file. Many dispatches, and many runs, can share one file
+
+    batch_size : int
+        Number of values written to disk per transaction
+
+    store : mri.utilities.EventStore
+        Already open store to write to instead of opening `path`, eg. to share one connection
+        between the dispatches of a process
+    """
+    def __init__(self, task_params, path=None, batch_size=1000, store=None):
+        super().__init__()
+        if store is None and path is None:
+            raise ValueError('SqliteDispatch needs a path or a store')
+        self.task_params = task_params
+        self.report_id = task_params['id']
+        self._owns_store = store is None
+        self.store = store if store is not None else EventStore(path, batch_size)
+
+    def setup_display(self, time_axis, attributes):
+        """Record the report's title, time axis and attributes in the store"""
+        super().setup_display(time_axis, attributes)
+        self.store.add_report(self.report_id, self.task_params.get('title', self.report_id), time_axis, attributes)
+
+    def train_event(self, event):
+        """Store a single training event
+
+        Arguments
+        ---------
+        event : TrainingEvent.TrainingEvent
+            Event to store
+        """
+        super().train_event(event)
+        self._store(event)
+
+    def train_events(self, events):
+        """Store many training events, see BaseDispatch.train_events"""
+        count = 0
+        for event in self._iter_events(events):
+            self._store(event)
+            count += 1
+        return count
+
+    def train_finish(self):
+        """Write any buffered events to disk, closing the store if this dispatch opened it"""
+        super().train_finish()
+        if self._owns_store:
+            self.store.close()
+        else:
+            self.store.flush()
+
+    def query(self, attributes=None, start=None, stop=None):
+        """Read this dispatch's report back as NumPy arrays, see EventStore.query"""
+        return self.store.query(self.report_id, attributes, start, stop)
+
+    def _store(self, event):
+        time_val = event.attributes[event.time_axis]
+        self.store.append(self.report_id, time_val,
+                          dict((k, v) for k, v in event.attributes.items() if k != event.time_axis))
@@ -4,5 +4,22 @@ from __future__ import division
 from __future__ import absolute_import
 from future import standard_library
 standard_library.install_aliases()
+import sys
 from .MatplotlibDispatch import MatplotlibDispatch
 from .MriServerDispatch import MriServerDispatch
+from .ReduceDispatch import ReduceDispatch
+from .FanoutDispatch import FanoutDispatch
+from .SharedReporter import SharedReporter, ReporterClient
+from .SqliteDispatch import SqliteDispatch
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # asyncio is slow to import, so the async dispatch is only loaded when asked for
+        if name == 'AsyncMriServerDispatch':
+            from .AsyncMriServerDispatch import AsyncMriServerDispatch
+            # Importing the submodule binds its name here, replace it with the class
+            globals()['AsyncMriServerDispatch'] = AsyncMriServerDispatch
+            return AsyncMriServerDispatch
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+elif sys.version_info >= (3, 5):
+    from .AsyncMriServerDispatch import AsyncMriServerDispatch
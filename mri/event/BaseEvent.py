@@ -6,5 +6,7 @@ from future import standard_library
 standard_library.install_aliases()
 class BaseEvent(object):
     """Base container for new events"""
+    __slots__ = ()
+
     def __init__(self):
         pass
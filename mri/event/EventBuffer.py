@@ -0,0 +1,111 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+from array import array
+
+from .TrainingEvent import TrainingEvent
+
+
+class EventBuffer(object):
+    """Columnar store for many training events sharing one schema. Each attribute is kept in its
+    own typed `array`, so storing an event allocates no per-event dictionaries or sets. Events are
+    validated against the schema by index lookups as they are appended.
+
+    Arguments
+    ---------
+    time_axis : string
+        Attribute representing time (eg iteration number or epoch, etc)
+
+    attributes : list
+        Every attribute events in this buffer may hold, including the time axis. The order here
+        is the column order used by `append_row`
+
+    typecodes : dict
+        Optional `array` typecode per attribute, eg. {'iteration': 'l'}. Defaults to 'd'. Only
+        'd' and 'f' columns may have missing values, which are stored as NaN in the column and
+        flagged in a separate mask, so NaN values that were actually reported are kept
+    """
+    __slots__ = ('time_axis', 'attributes', '_index', '_columns', '_missing', '_time_index')
+
+    def __init__(self, time_axis, attributes, typecodes=None):
+        if time_axis not in attributes:
+            raise ValueError('Attributes must contain the time-axis attribute')
+        if len(attributes) < 2:
+            raise ValueError('Attributes must contain at least one non-time axis attribute')
+        typecodes = typecodes or {}
+        self.time_axis = time_axis
+        self.attributes = tuple(attributes)
+        self._index = dict((name, i) for i, name in enumerate(self.attributes))
+        self._time_index = self._index[time_axis]
+        self._columns = [array(str(typecodes.get(name, 'd'))) for name in self.attributes]
+        self._missing = [array(str('B')) for _ in self.attributes]
+
+    def append(self, attributes):
+        """Append one event given as a dictionary of attribute values
+
+        Arguments
+        ---------
+        attributes : dict
+            Attribute values for this event. Must contain the time axis and at least one other
+            attribute, and no attribute outside this buffer's schema
+        """
+        row = [None] * len(self.attributes)
+        for name, value in attributes.items():
+            try:
+                row[self._index[name]] = value
+            except KeyError:
+                raise ValueError('Attribute {0} is not part of this buffer'.format(name))
+        self.append_row(row)
+
+    def append_row(self, values):
+        """Append one event given as a sequence of values in schema order, None for missing"""
+        if len(values) != len(self._columns):
+            raise ValueError('Expected {0} values, got {1}'.format(len(self._columns), len(values)))
+        if values[self._time_index] is None:
+            raise ValueError('Training events must contain the time axis attribute')
+        present = 0
+        for column, value in zip(self._columns, values):
+            if value is not None:
+                present += 1
+            elif column.typecode not in ('d', 'f'):
+                raise ValueError('Only floating point columns may have missing values')
+        if present < 2:
+            raise ValueError('Training events must contain at least one non-time axis attribute')
+        for column, missing, value in zip(self._columns, self._missing, values):
+            column.append(float('nan') if value is None else value)
+            missing.append(value is None)
+
+    def extend(self, events):
+        """Append every TrainingEvent in `events`"""
+        for event in events:
+            if event.time_axis != self.time_axis:
+                raise ValueError('Time-axis mismatch between buffer and event')
+            self.append(event.attributes)
+
+    def column(self, name):
+        """Typed array holding every value of attribute `name`, NaN where missing"""
+        return self._columns[self._index[name]]
+
+    def row(self, i):
+        """Values of the `i`th event in schema order, None where missing"""
+        return [None if missing[i] else column[i] for column, missing in zip(self._columns, self._missing)]
+
+    def clear(self):
+        """Remove every event while keeping the schema"""
+        for i, column in enumerate(self._columns):
+            self._columns[i] = array(column.typecode)
+            self._missing[i] = array(str('B'))
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __iter__(self):
+        """Yield the buffered events as TrainingEvents"""
+        for i in range(len(self)):
+            attributes = dict((name, value) for name, value in zip(self.attributes, self.row(i))
+                              if value is not None)
+            yield TrainingEvent(attributes, self.time_axis)
@@ -21,6 +21,8 @@ class TrainingEvent(BaseEvent):
         Dictonary of attributes for this training event. Must include the time axis attribute and at least one other
 
     """
+    __slots__ = ('time_axis', 'attributes')
+
     def __init__(self, attributes, time_axis):
         super().__init__()
         if time_axis not in attributes:
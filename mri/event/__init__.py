@@ -6,3 +6,4 @@ from future import standard_library
 standard_library.install_aliases()
 from .BaseEvent import BaseEvent
 from .TrainingEvent import TrainingEvent
+from .EventBuffer import EventBuffer
@@ -6,4 +6,13 @@ from future import standard_library
 standard_library.install_aliases()
 from .cd import cd
 from .server_consts import ServerConsts
-from .send_request import send_request
\ No newline at end of file
+from .session_pool import SessionPool
+from .circuit_breaker import CircuitBreaker
+from .rate_limiter import RateLimiter
+from .metrics import ClientMetrics
+from .send_request import send_request
+from .batch_sender import BatchSender
+from .spool import Spool
+from .report_index import ReportIndex
+from .event_store import EventStore
+from .log_tailer import LogTailer
@@ -0,0 +1,145 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import logging
+import queue
+import threading
+import time
+
+
+class BatchSender(object):
+    """Background worker that coalesces queued items into batches and hands each batch to a
+    send function. Items are batched until either `batch_size` items are waiting or `linger`
+    seconds have passed since the first item of the batch arrived.
+
+    Arguments
+    ---------
+    send_fn : callable
+        Called from the worker thread with a list of items for every batch. A batch counts as
+        sent unless `send_fn` raises or returns False, either of which counts as an error
+
+    batch_size : int
+        Maximum number of items passed to `send_fn` at once
+
+    linger : float
+        Maximum number of seconds to wait for a batch to fill up before sending it
+
+    queue_size : int
+        Maximum number of items waiting to be sent, 0 for unbounded
+
+    block : bool
+        If True, `put` waits for room when the queue is full, otherwise the item is dropped
+    """
+    _STOP = object()
+
+    def __init__(self, send_fn, batch_size=100, linger=0.5, queue_size=10000, block=True):
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+        self._send_fn = send_fn
+        self.batch_size = batch_size
+        self.linger = linger
+        self.block = block
+        self.queued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='mri-batch-sender')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, item):
+        """Queue an item for sending
+
+        Arguments
+        ---------
+        item : object
+            Item to pass along to the send function as part of a batch
+
+        Returns
+        -------
+        queued : bool
+            False if the item was dropped because the queue was full
+        """
+        if self._closed:
+            raise ValueError('Cannot queue items on a closed sender')
+        try:
+            self._queue.put(item, block=self.block)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logging.warning('Send queue full, {0} items dropped so far'.format(self.dropped))
+            return False
+        self.queued += 1
+        return True
+
+    def flush(self):
+        """Block until every item queued so far has been handed to the send function"""
+        self._queue.join()
+
+    def close(self, timeout=None):
+        """Send everything still queued and stop the worker thread
+
+        Arguments
+        ---------
+        timeout : float
+            Maximum number of seconds to wait for the worker, None to wait forever
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # The stop marker must always get in, even if the queue is full
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Counters for this sender as a dictionary"""
+        return {
+            'queued': self.queued,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': self._queue.qsize()
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                break
+            batch = [item]
+            deadline = time.time() + self.linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            self._send(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _send(self, batch):
+        try:
+            if self._send_fn(batch) is False:
+                self.errors += 1
+                logging.warning('Failed to send batch of {0} items'.format(len(batch)))
+            else:
+                self.sent += len(batch)
+        except Exception as ex:
+            self.errors += 1
+            logging.warning('Failed to send batch of {0} items'.format(len(batch)))
+            logging.warning('Message from exception: {0}'.format(ex))
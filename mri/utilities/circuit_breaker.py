@@ -0,0 +1,80 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import logging
+import threading
+import time
+
+from .session_pool import server_key
+
+
+class CircuitBreaker(object):
+    """Tracks whether a server is reachable so requests to a server that is known to be down
+    fail immediately instead of each waiting out a connection failure. After
+    `failure_threshold` consecutive failures the breaker opens and refuses requests for
+    `reset_timeout` seconds, then lets a single trial request through: success closes it again,
+    failure re-opens it.
+
+    Arguments
+    ---------
+    failure_threshold : int
+        Consecutive failures needed to open the breaker
+
+    reset_timeout : float
+        Seconds to wait before letting a trial request through
+    """
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_address(cls, address):
+        """Breaker shared by every request to the server at `address`"""
+        key = server_key(address)
+        with cls._registry_lock:
+            breaker = cls._registry.get(key)
+            if breaker is None:
+                breaker = cls._registry[key] = cls()
+            return breaker
+
+    @property
+    def is_open(self):
+        return self._opened is not None
+
+    def allow(self):
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self._opened is None:
+                return True
+            if not self._trial and time.time() - self._opened >= self.reset_timeout:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened is not None:
+                logging.info('Server reachable again, closing circuit breaker')
+            self.failures = 0
+            self._opened = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self._opened is None and self.failures >= self.failure_threshold):
+                if self._opened is None:
+                    logging.warning('Server unreachable, holding requests for {0}s'.format(self.reset_timeout))
+                self._opened = time.time()
+                self._trial = False
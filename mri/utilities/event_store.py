@@ -0,0 +1,154 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import json
+import numbers
+import os
+import sqlite3
+import threading
+
+
+class EventStore(object):
+    """Embedded on-disk store of training events, backed by SQLite in WAL mode so a run can be
+    queried while it is being written. Values are kept one row per (report, attribute, time),
+    clustered on that key, so reading a time range of some attributes doesn't scan the rest of
+    the run. Appends are buffered and written `batch_size` rows per transaction. Only numeric
+    values can be stored.
+
+    The clustered layout uses a WITHOUT ROWID table, which needs SQLite 3.8.2 or later. With an
+    older SQLite the table is created as an ordinary one indexed on the same key, which is
+    slower to read but otherwise equivalent.
+
+    Arguments
+    ---------
+    path : string
+        Database file, created along with its folder if needed
+
+    batch_size : int
+        Number of buffered values written per transaction
+    """
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS reports '
+                               '(id TEXT PRIMARY KEY, title TEXT, time_axis TEXT, attributes TEXT)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS event_values '
+                               '(report TEXT, attribute TEXT, time REAL, value REAL, '
+                               'PRIMARY KEY (report, attribute, time))' +
+                               (' WITHOUT ROWID' if sqlite3.sqlite_version_info >= (3, 8, 2) else ''))
+
+    def add_report(self, report_id, title, time_axis, attributes):
+        """Create or update a report's description"""
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?)',
+                               (report_id, title, time_axis, json.dumps(list(attributes))))
+
+    def reports(self):
+        """All reports in the store, in format {id: {'title', 'time_axis', 'attributes'}}"""
+        with self._lock:
+            rows = self._conn.execute('SELECT id, title, time_axis, attributes FROM reports').fetchall()
+        return dict((r[0], {'title': r[1], 'time_axis': r[2], 'attributes': json.loads(r[3])}) for r in rows)
+
+    def append(self, report_id, time_val, attributes):
+        """Buffer the values of one event, writing the buffer once it holds `batch_size` values.
+        A later value for the same report, attribute and time replaces the earlier one
+
+        Arguments
+        ---------
+        report_id : string
+            Report the event belongs to
+
+        time_val : float
+            Time axis value of the event
+
+        attributes : dict
+            Attribute values of the event, excluding the time axis. None values are skipped, and
+            values that aren't numbers raise a ValueError without storing any of the event
+        """
+        values = [(name, value) for name, value in attributes.items() if value is not None]
+        for name, value in [('time', time_val)] + values:
+            if not isinstance(value, numbers.Real):
+                raise ValueError('Only numbers can be stored, got {0!r} for {1}'.format(value, name))
+        with self._lock:
+            for name, value in values:
+                self._pending.append((report_id, name, time_val, value))
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def flush(self):
+        """Write any buffered values"""
+        with self._lock:
+            self._write()
+
+    def query(self, report_id, attributes=None, start=None, stop=None):
+        """Read part of a report as NumPy arrays
+
+        Arguments
+        ---------
+        report_id : string
+            Report to read
+
+        attributes : list
+            Attributes to read, defaults to all of the report's attributes
+
+        start : float
+            Smallest time axis value to read, inclusive
+
+        stop : float
+            Largest time axis value to read, inclusive
+
+        Returns
+        -------
+        data : dict
+            Maps the report's time axis to the sorted array of times at which any of the
+            attributes has a value, and each attribute to an array of its values at those
+            times, NaN where it has none
+        """
+        import numpy as np
+        report = self.reports().get(report_id)
+        if report is None:
+            raise KeyError('No report {0} in {1}'.format(report_id, self.path))
+        if attributes is None:
+            attributes = [a for a in report['attributes'] if a != report['time_axis']]
+        self.flush()
+        columns = {}
+        with self._lock:
+            for name in attributes:
+                rows = self._conn.execute(
+                    'SELECT time, value FROM event_values WHERE report = ? AND attribute = ? '
+                    'AND time >= ? AND time <= ? ORDER BY time',
+                    (report_id, name, -float('inf') if start is None else start,
+                     float('inf') if stop is None else stop)).fetchall()
+                columns[name] = np.array(rows, dtype=float).reshape(-1, 2)
+        times = np.unique(np.concatenate([c[:, 0] for c in columns.values()] or [np.empty(0)]))
+        data = {report['time_axis']: times}
+        for name, column in columns.items():
+            values = np.full(len(times), np.nan)
+            values[np.searchsorted(times, column[:, 0])] = column[:, 1]
+            data[name] = values
+        return data
+
+    def close(self):
+        """Write any buffered values and close the database"""
+        with self._lock:
+            self._write()
+            self._conn.close()
+
+    def _write(self):
+        if self._pending:
+            with self._conn:
+                self._conn.executemany('INSERT OR REPLACE INTO event_values VALUES (?, ?, ?, ?)', self._pending)
+            self._pending = []
@@ -0,0 +1,208 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from mri.event import TrainingEvent
+
+
+class LogTailer(object):
+    """Follow a growing log file and turn its lines into TrainingEvents, eg. for jobs that log
+    their metrics rather than report them from Python. Only complete lines are read and each
+    line is read once. The read offset can be persisted so a restarted tailer continues where
+    it stopped, and rotated or truncated logs are followed to the new file.
+
+    Arguments
+    ---------
+    path : string
+        Log file to follow. It doesn't have to exist yet
+
+    time_axis : string
+        Name of the attribute representing time eg. iterations, epoch, etc
+
+    parser : string or callable
+        A regular expression whose named groups are the attributes of an event, eg.
+        r'Iteration (?P<iteration>\\d+), loss = (?P<loss>\\S+)', or a function taking a line
+        and returning a dictionary of attributes or None. Defaults to one JSON object per line
+
+    offset_path : string
+        File to persist the read offset in after every batch handed to a dispatch
+
+    batch_size : int
+        Maximum number of events read and handed to a dispatch at once
+
+    poll_interval : float
+        Seconds to wait for the log to grow when all of it has been read
+    """
+    def __init__(self, path, time_axis, parser=None, offset_path=None, batch_size=100, poll_interval=1.0):
+        self.path = path
+        self.time_axis = time_axis
+        if parser is None:
+            parser = self.json_parser
+        elif not callable(parser):
+            parser = self.regex_parser(parser)
+        self.parser = parser
+        self.offset_path = offset_path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._stop = threading.Event()
+        if offset_path is not None and os.path.exists(offset_path):
+            with open(offset_path) as f:
+                saved = json.load(f)
+            self._inode, self._offset = saved['inode'], saved['offset']
+
+    @staticmethod
+    def regex_parser(pattern):
+        """Parser returning the named groups of `pattern` as numbers, None for lines without a match"""
+        pattern = re.compile(pattern)
+
+        def parse(line):
+            match = pattern.search(line)
+            if match is None:
+                return None
+            return dict((k, _number(v)) for k, v in match.groupdict().items() if v is not None)
+        return parse
+
+    @staticmethod
+    def json_parser(line):
+        """Parser for lines holding a JSON object, None for blank or malformed lines"""
+        try:
+            attributes = json.loads(line)
+        except ValueError:
+            return None
+        return attributes if isinstance(attributes, dict) else None
+
+    def read(self, max_events=None):
+        """Read the lines appended since the last call
+
+        Arguments
+        ---------
+        max_events : int
+            Stop reading once this many events are found, leaving the rest of the log for the
+            next call. None to read everything
+
+        Returns
+        -------
+        events : list
+            TrainingEvents for the new lines the parser recognized
+        """
+        events = []
+        for line in self._read_lines():
+            attributes = self.parser(line)
+            if not attributes or self.time_axis not in attributes or len(attributes) < 2:
+                continue
+            events.append(TrainingEvent(attributes, self.time_axis))
+            if max_events is not None and len(events) >= max_events:
+                break
+        return events
+
+    def follow(self, dispatch, idle_timeout=None):
+        """Hand new events to `dispatch.train_events` in batches until `stop` is called, or until
+        nothing is appended to the log for `idle_timeout` seconds. Only one batch is read at a
+        time and the offset is saved after each, so large logs are backfilled in bounded memory
+
+        Arguments
+        ---------
+        dispatch : mri.dispatch.BaseDispatch
+            Dispatch to send events to, already set up with `setup_display`
+
+        idle_timeout : float
+            Seconds without new events after which to return, None to follow until stopped
+
+        Returns
+        -------
+        count : int
+            Number of events handed to the dispatch
+        """
+        count = 0
+        idle_since = time.time()
+        while not self._stop.is_set():
+            events = self.read(self.batch_size)
+            if events:
+                dispatch.train_events(events)
+                count += len(events)
+                self.save_offset()
+                idle_since = time.time()
+            elif idle_timeout is not None and time.time() - idle_since >= idle_timeout:
+                break
+            else:
+                self._stop.wait(self.poll_interval)
+        return count
+
+    def stop(self):
+        """Make `follow` return after its current batch, eg. from another thread"""
+        self._stop.set()
+
+    def save_offset(self):
+        """Persist the read offset to `offset_path`, replacing the previous one atomically"""
+        if self.offset_path is None:
+            return
+        tmp_path = self.offset_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'inode': self._inode, 'offset': self._offset}, f)
+        getattr(os, 'replace', os.rename)(tmp_path, self.offset_path)
+
+    def close(self):
+        """Close the log file, keeping the offset"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_lines(self):
+        """Yield the complete lines appended since the last read, switching to a new file when the
+        log is rotated and starting over when it is truncated"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            stat = None
+        if self._file is not None and (stat is None or stat.st_ino != self._inode):
+            # Rotated: finish the old file before moving on to the new one
+            for line in self._read_open():
+                yield line
+            self.close()
+            self._inode, self._offset = None, 0
+        if stat is None:
+            return
+        if self._file is None:
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                logging.info('Reading {0} from the start'.format(self.path))
+                self._offset = 0
+            self._file = open(self.path, 'rb')
+            self._inode = stat.st_ino
+        elif stat.st_size < self._offset:
+            logging.info('{0} was truncated, reading it from the start'.format(self.path))
+            self._offset = 0
+        for line in self._read_open():
+            yield line
+
+    def _read_open(self):
+        self._file.seek(self._offset)
+        while True:
+            line = self._file.readline()
+            if not line.endswith(b'\n'):
+                # Incomplete lines are left for the next read
+                return
+            self._offset += len(line)
+            yield line.decode('utf-8', 'replace').rstrip('\r\n')
+
+
+def _number(text):
+    """Convert a matched value to an int or float if it looks like one"""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
@@ -0,0 +1,126 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import collections
+import io
+import json
+import threading
+import time
+
+
+class _Timings(object):
+    """Count, total and a bounded window of recent samples for percentile estimates"""
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.samples = collections.deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def percentile(p):
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+        return {
+            'count': self.count,
+            'total': self.total,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99)
+        }
+
+
+class ClientMetrics(object):
+    """Thread-safe counters and latency statistics for the client itself: requests per endpoint,
+    bytes sent, events queued/sent/dropped/spooled/skipped and the time spent inside `train_event`.
+    Percentiles are computed over the most recent `window` samples of each timing.
+
+    Arguments
+    ---------
+    window : int
+        Number of recent samples kept per timing for percentiles
+    """
+    EVENT_COUNTERS = ('queued', 'sent', 'dropped', 'spooled', 'skipped')
+
+    def __init__(self, window=10000):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear every counter and timing"""
+        with self._lock:
+            self._started = time.time()
+            self._endpoints = {}
+            self._events = dict((name, 0) for name in self.EVENT_COUNTERS)
+            self._timings = {}
+
+    def record_request(self, endpoint, seconds, bytes_sent, status):
+        """Record one HTTP request
+
+        Arguments
+        ---------
+        endpoint : string
+            Method and path of the request, eg. 'POST /api/events'
+
+        seconds : float
+            Time taken by the request, including any retries
+
+        bytes_sent : int
+            Size of the request body
+
+        status : int
+            Response status code, None if no response was received
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {'bytes': 0, 'errors': 0, 'latency': _Timings(self.window)}
+            stats['latency'].add(seconds)
+            stats['bytes'] += bytes_sent
+            if status is None or status >= 400:
+                stats['errors'] += 1
+
+    def count_events(self, name, count=1):
+        """Add `count` to one of the event counters: queued, sent, dropped, spooled or skipped"""
+        with self._lock:
+            self._events[name] += count
+
+    def record_time(self, name, seconds):
+        """Record time spent in a named section of client code, eg. 'train_event'"""
+        with self._lock:
+            timings = self._timings.get(name)
+            if timings is None:
+                timings = self._timings[name] = _Timings(self.window)
+            timings.add(seconds)
+
+    def snapshot(self):
+        """Current state of every metric as a JSON-serializable dictionary"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._endpoints.items():
+                summary = stats['latency'].summary()
+                summary['bytes'] = stats['bytes']
+                summary['errors'] = stats['errors']
+                endpoints[endpoint] = summary
+            return {
+                'elapsed': time.time() - self._started,
+                'requests': endpoints,
+                'events': dict(self._events),
+                'timings': dict((name, t.summary()) for name, t in self._timings.items())
+            }
+
+    def dump(self, path):
+        """Write a snapshot to `path` as JSON"""
+        with io.open(path, 'w', encoding='utf-8') as out:
+            out.write(json.dumps(self.snapshot(), indent=2, sort_keys=True))
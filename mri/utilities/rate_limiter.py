@@ -0,0 +1,165 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+from collections import deque
+import json
+import threading
+import time
+
+from .session_pool import server_key
+
+
+class RateLimiter(object):
+    """Token bucket limiting the requests per second and bytes per second sent to a server, so
+    many runs reporting at once smooth their bursts out instead of overloading it. Requests
+    waiting for the budget are served round robin by key, eg. by report, so one busy report
+    can't starve the others. With `lock_path`, the buckets are kept in that file under an
+    exclusive lock and shared by every process on the host using the same file.
+
+    Arguments
+    ---------
+    requests_per_second : float
+        Sustained request rate, None for no limit
+
+    bytes_per_second : float
+        Sustained rate of request body bytes, None for no limit
+
+    burst : float
+        Seconds of budget that can be saved up and spent at once
+
+    lock_path : string
+        File to share the buckets through between processes. Requires fcntl, ie. a POSIX host
+    """
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, requests_per_second=None, bytes_per_second=None, burst=1.0, lock_path=None):
+        self._cond = threading.Condition()
+        self._waiting = {}
+        self._turns = deque()
+        self.set_limits(requests_per_second, bytes_per_second, burst, lock_path)
+
+    @classmethod
+    def for_address(cls, address):
+        """Limiter shared by every request to the server at `address`, unlimited until
+        `set_limits` is called on it"""
+        key = server_key(address)
+        with cls._registry_lock:
+            limiter = cls._registry.get(key)
+            if limiter is None:
+                limiter = cls._registry[key] = cls()
+            return limiter
+
+    def set_limits(self, requests_per_second=None, bytes_per_second=None, burst=1.0, lock_path=None):
+        """Change the budgets, see the class arguments. The buckets start full"""
+        if lock_path is not None:
+            import fcntl  # noqa: F401, fail early on hosts without it
+        with self._cond:
+            self.requests_per_second = requests_per_second
+            self.bytes_per_second = bytes_per_second
+            self.burst = burst
+            self.lock_path = lock_path
+            self._state = None
+            self._cond.notify_all()
+
+    @property
+    def limited(self):
+        return self.requests_per_second is not None or self.bytes_per_second is not None
+
+    def acquire(self, nbytes=0, key=None):
+        """Wait until a request of `nbytes` fits in the budget, then spend it
+
+        Arguments
+        ---------
+        nbytes : int
+            Size of the request body
+
+        key : hashable
+            What to share the budget fairly between, eg. the report sending the request
+        """
+        if not self.limited:
+            return
+        with self._cond:
+            ticket = object()
+            queue = self._waiting.get(key)
+            if queue is None:
+                queue = self._waiting[key] = deque()
+                self._turns.append(key)
+            queue.append(ticket)
+            try:
+                while True:
+                    if self._turns[0] == key and queue[0] is ticket:
+                        wait = self._take(nbytes)
+                        if not wait:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                # Leave the line even if waiting failed, passing the turn on to the next key and
+                # queueing this one again if it has more waiting
+                had_turn = self._turns[0] == key and queue[0] is ticket
+                queue.remove(ticket)
+                if had_turn:
+                    self._turns.popleft()
+                    if queue:
+                        self._turns.append(key)
+                elif not queue:
+                    self._turns.remove(key)
+                if not queue:
+                    del self._waiting[key]
+                self._cond.notify_all()
+
+    def _take(self, nbytes):
+        """Spend one request and `nbytes` if the buckets allow, returns 0 if spent or the number
+        of seconds until they will"""
+        if self.lock_path is None:
+            if self._state is None:
+                self._state = self._full()
+            return self._spend(self._state, nbytes)
+        import fcntl
+        with open(self.lock_path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            text = f.read()
+            state = json.loads(text) if text else self._full()
+            wait = self._spend(state, nbytes)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+        return wait
+
+    def _full(self):
+        return {'time': time.time(), 'requests': self._capacity(self.requests_per_second),
+                'bytes': self._capacity(self.bytes_per_second)}
+
+    def _capacity(self, rate):
+        return None if rate is None else max(rate * self.burst, 1)
+
+    def _spend(self, state, nbytes):
+        now = time.time()
+        elapsed = max(now - state['time'], 0)
+        state['time'] = now
+        wait = 0
+        for name, rate, cost in (('requests', self.requests_per_second, 1), ('bytes', self.bytes_per_second, nbytes)):
+            if rate is None:
+                continue
+            capacity = self._capacity(rate)
+            tokens = min(capacity, (state.get(name) or 0) + elapsed * rate)
+            state[name] = tokens
+            # Requests larger than the bucket go through once it is full, leaving it in debt
+            needed = min(cost, capacity)
+            if tokens < needed:
+                wait = max(wait, (needed - tokens) / rate)
+        if wait:
+            return wait
+        if self.requests_per_second is not None:
+            state['requests'] -= 1
+        if self.bytes_per_second is not None:
+            state['bytes'] -= nbytes
+        return 0
@@ -0,0 +1,147 @@
+"""Reducers thin out a stream of (time, value) points before they are dispatched. Each reducer
+handles a single attribute: `push` takes one point and returns the points to send, possibly none,
+and `flush` returns whatever is still held back once training finishes."""
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+
+
+class BaseReducer(object):
+    """Pass-through reducer, base class for the others"""
+    def push(self, time_val, value):
+        return [(time_val, value)]
+
+    def flush(self):
+        return []
+
+
+class EveryNth(BaseReducer):
+    """Keep every `n`th point, plus the last point so the final value is never lost
+
+    Arguments
+    ---------
+    n : int
+        Sampling interval
+    """
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError('Sampling interval must be at least 1')
+        self.n = n
+        self._count = 0
+        self._last = None
+
+    def push(self, time_val, value):
+        keep = self._count % self.n == 0
+        self._count += 1
+        self._last = None if keep else (time_val, value)
+        return [(time_val, value)] if keep else []
+
+    def flush(self):
+        last, self._last = self._last, None
+        return [last] if last is not None else []
+
+
+class Window(BaseReducer):
+    """Aggregate each run of `size` points into a single point at the time of the last one
+
+    Arguments
+    ---------
+    size : int
+        Number of points per window
+
+    stat : string
+        One of 'mean', 'min' or 'max'
+    """
+    _STATS = {
+        'mean': lambda values: sum(values) / len(values),
+        'min': min,
+        'max': max
+    }
+
+    def __init__(self, size, stat='mean'):
+        if stat not in self._STATS:
+            raise ValueError('Unknown window statistic {0}'.format(stat))
+        self.size = size
+        self.stat = stat
+        self._times = []
+        self._values = []
+
+    def push(self, time_val, value):
+        self._times.append(time_val)
+        self._values.append(value)
+        if len(self._values) >= self.size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self._values:
+            return []
+        point = (self._times[-1], self._STATS[self.stat](self._values))
+        self._times = []
+        self._values = []
+        return [point]
+
+
+class LTTB(BaseReducer):
+    """Streaming Largest-Triangle-Three-Buckets decimation. Points are grouped into buckets of
+    `bucket_size` and one point is kept per bucket: the one forming the largest triangle with the
+    previously kept point and the average of the following bucket. This keeps the visual shape
+    of the curve, spikes included, far better than plain sampling.
+
+    Arguments
+    ---------
+    bucket_size : int
+        Number of incoming points per kept point
+    """
+    def __init__(self, bucket_size):
+        if bucket_size < 1:
+            raise ValueError('Bucket size must be at least 1')
+        self.bucket_size = bucket_size
+        self._prev = None
+        self._bucket = []
+        self._next = []
+
+    def push(self, time_val, value):
+        point = (time_val, value)
+        if self._prev is None:
+            self._prev = point
+            return [point]
+        if len(self._bucket) < self.bucket_size:
+            self._bucket.append(point)
+            return []
+        self._next.append(point)
+        if len(self._next) < self.bucket_size:
+            return []
+        chosen = self._select(self._average(self._next))
+        self._bucket, self._next = self._next, []
+        return [chosen]
+
+    def flush(self):
+        out = []
+        if self._bucket and self._next:
+            out.append(self._select(self._average(self._next)))
+            self._bucket = self._next
+        if self._bucket:
+            out.append(self._bucket[-1])
+        self._prev = None
+        self._bucket = []
+        self._next = []
+        return out
+
+    def _select(self, after):
+        (ax, ay), (cx, cy) = self._prev, after
+        best, best_area = None, -1
+        for bx, by in self._bucket:
+            area = abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+            if area > best_area:
+                best, best_area = (bx, by), area
+        self._prev = best
+        return best
+
+    @staticmethod
+    def _average(points):
+        return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
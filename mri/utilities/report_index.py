@@ -0,0 +1,138 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import bisect
+import threading
+import time
+import weakref
+
+from .session_pool import server_key
+
+
+class ReportIndex(object):
+    """Client-side index of the reports on a server, mapping ids to titles and titles to ids.
+    Titles are also kept sorted so prefix lookups don't scan every report. The index goes stale
+    `ttl` seconds after it was last filled from the server.
+
+    Indexes registered for a server address are kept up to date by every dispatch reporting to
+    that address, via `notify_created`.
+
+    Arguments
+    ---------
+    ttl : float
+        Number of seconds the index is trusted after being filled from the server
+    """
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._titles = {}
+        self._ids = {}
+        self._sorted_titles = []
+        self._fetched = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def register(cls, address, index):
+        """Keep `index` up to date with reports created by dispatches for `address`"""
+        with cls._registry_lock:
+            cls._registry.setdefault(server_key(address), weakref.WeakSet()).add(index)
+
+    @classmethod
+    def notify_created(cls, address, report_id, title):
+        """Record a newly created report in every index registered for `address`"""
+        with cls._registry_lock:
+            indexes = list(cls._registry.get(server_key(address), ()))
+        for index in indexes:
+            index.add(report_id, title)
+
+    @property
+    def stale(self):
+        """True if the index was never filled or is older than its ttl"""
+        return self._fetched is None or time.time() - self._fetched > self.ttl
+
+    def invalidate(self):
+        """Mark the index stale so it is refilled on next use"""
+        self._fetched = None
+
+    def update(self, reports):
+        """Replace the index contents with a fresh listing from the server
+
+        Arguments
+        ---------
+        reports : dict
+            Reports in format {id: title}
+        """
+        with self._lock:
+            self._titles = {}
+            self._ids = {}
+            for report_id, title in reports.items():
+                self._add(report_id, title)
+            self._sorted_titles = sorted(self._ids)
+            self._fetched = time.time()
+
+    def add(self, report_id, title):
+        """Add or rename a single report"""
+        with self._lock:
+            self.remove(report_id)
+            if title not in self._ids:
+                bisect.insort(self._sorted_titles, title)
+            self._add(report_id, title)
+
+    def remove(self, report_id):
+        """Drop a single report, if present"""
+        with self._lock:
+            title = self._titles.pop(report_id, None)
+            if title is None:
+                return
+            ids = self._ids[title]
+            ids.discard(report_id)
+            if not ids:
+                del self._ids[title]
+                del self._sorted_titles[bisect.bisect_left(self._sorted_titles, title)]
+
+    def reports(self):
+        """Copy of the indexed reports in format {id: title}"""
+        with self._lock:
+            return dict(self._titles)
+
+    def search(self, title, mode='exact'):
+        """Find report ids by title
+
+        Arguments
+        ---------
+        title : string
+            Title, title prefix, or part of a title to look for
+
+        mode : string
+            One of 'exact', 'prefix' or 'substring'
+
+        Returns
+        -------
+        ids : list
+            List of ids of matching reports
+        """
+        with self._lock:
+            if mode == 'exact':
+                titles = [title] if title in self._ids else []
+            elif mode == 'prefix':
+                start = bisect.bisect_left(self._sorted_titles, title)
+                titles = []
+                for name in self._sorted_titles[start:]:
+                    if not name.startswith(title):
+                        break
+                    titles.append(name)
+            elif mode == 'substring':
+                titles = [name for name in self._sorted_titles if title in name]
+            else:
+                raise ValueError('Unknown search mode {0}'.format(mode))
+            return [report_id for name in titles for report_id in sorted(self._ids[name])]
+
+    def _add(self, report_id, title):
+        self._titles[report_id] = title
+        self._ids.setdefault(title, set()).add(report_id)
@@ -1,8 +1,22 @@
 import requests
 import logging
+import random
+import time
+import urllib.parse
 
+from .circuit_breaker import CircuitBreaker
+from .rate_limiter import RateLimiter
+from .server_consts import ServerConsts
+from .session_pool import SessionPool
 
-def send_request(address, protocol, data, auth):
+# Requests that can safely be repeated
+IDEMPOTENT = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+# Responses that mean the server is struggling rather than rejecting the request
+RETRY_STATUSES = (502, 503, 504)
+
+
+def send_request(address, protocol, data, auth, session=None, headers=None, timeout=ServerConsts.TIMEOUT,
+                 retries=0, backoff=0.5, breaker=None, metrics=None, limiter=None, limit_key=None):
     """Send an HTTP request
 
     Arguments
@@ -19,24 +33,96 @@ def send_request(address, protocol, data, auth):
     auth : tuple
         (username, pass) for server
 
+    session : requests.Session
+        Session to send the request with. Defaults to the shared session for this server
+
+    headers : dict
+        Extra headers, overriding the default JSON Content-Type if needed
+
+    timeout : tuple
+        (connect, read) timeouts in seconds
+
+    retries : int
+        Number of times to retry idempotent requests after network errors or 502/503/504
+        responses, with jittered exponential backoff. Other requests are never retried
+
+    backoff : float
+        Base delay in seconds before the first retry, doubled for each retry after it
+
+    breaker : mri.utilities.CircuitBreaker
+        Circuit breaker to check before sending. Defaults to the shared breaker for this server
+
+    metrics : mri.utilities.ClientMetrics
+        Metrics to record the request's latency, size and outcome in
+
+    limiter : mri.utilities.RateLimiter
+        Rate limiter to wait for before each attempt. Defaults to the shared limiter for this
+        server, which doesn't limit anything until its limits are set
+
+    limit_key : hashable
+        What the limiter shares its budget fairly between, eg. the report sending the request
+
     Returns
     -------
     result : requests.Response
-        Response from the server, includes response code, encoding, and text
+        Response from the server, includes response code, encoding, and text. None if the
+        request could not be sent or the server is known to be down
     """
-    headers = {'Content-Type': 'application/json'}
-    try:
-        protocol = protocol.upper()
-        result = requests.request(method=protocol, url=address, data=data, headers=headers, auth=auth)
-        logging.info('Sent request, result {0}'.format(result.status_code))
-        if result.status_code != 200:
-            logging.warning('Request not 200, server says {0}'.format(result.text))
-    except requests.exceptions.ConnectionError as ex:
-        logging.warning('Failed to send request because of a network problem')
-        logging.warning('Message from exception: {0}'.format(ex))
-        return None
-    except requests.exceptions.ConnectTimeout as ex:
-        logging.warning('Failed to send request because the server timed out')
-        logging.warning('Message from exception: {0}'.format(ex))
-        return None
+    request_headers = {'Content-Type': 'application/json'}
+    if headers:
+        request_headers.update(headers)
+    if session is None:
+        session = SessionPool.default().get_session(address)
+    if breaker is None:
+        breaker = CircuitBreaker.for_address(address)
+    if limiter is None:
+        limiter = RateLimiter.for_address(address)
+    protocol = protocol.upper()
+    start = time.time()
+    result = _send(session, address, protocol, data, auth, request_headers, timeout, retries, backoff, breaker,
+                   limiter, limit_key)
+    if metrics is not None:
+        endpoint = '{0} {1}'.format(protocol, urllib.parse.urlsplit(address).path)
+        metrics.record_request(endpoint, time.time() - start, len(data) if data else 0,
+                               None if result is None else result.status_code)
+    return result
+
+
+def _send(session, address, protocol, data, auth, headers, timeout, retries, backoff, breaker, limiter, limit_key):
+    """Send a request with retries, see send_request"""
+    attempts = 1 + (retries if protocol in IDEMPOTENT else 0)
+    result = None
+    for attempt in range(attempts):
+        if not breaker.allow():
+            logging.debug('Server is down, not sending request')
+            return None
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        try:
+            limiter.acquire(len(data) if data else 0, limit_key)
+            result = session.request(method=protocol, url=address, data=data, headers=headers,
+                                     auth=auth, timeout=timeout)
+            logging.info('Sent request, result {0}'.format(result.status_code))
+            if result.status_code != 200:
+                logging.warning('Request not 200, server says {0}'.format(result.text))
+        except requests.exceptions.Timeout as ex:
+            logging.warning('Failed to send request because the server timed out')
+            logging.warning('Message from exception: {0}'.format(ex))
+            result = None
+        except requests.exceptions.ConnectionError as ex:
+            logging.warning('Failed to send request because of a network problem')
+            logging.warning('Message from exception: {0}'.format(ex))
+            result = None
+        except requests.exceptions.RequestException as ex:
+            logging.warning('Failed to send request')
+            logging.warning('Message from exception: {0}'.format(ex))
+            result = None
+        except Exception:
+            # Never leave the breaker waiting on a trial request that didn't finish
+            breaker.record_failure()
+            raise
+        if result is not None and result.status_code not in RETRY_STATUSES:
+            breaker.record_success()
+            return result
+        breaker.record_failure()
     return result
@@ -3,10 +3,13 @@ user-changable but should be editable in source just in case"""
 
 
 class ServerConsts(object):
+    # Default (connect, read) timeouts for requests, in seconds
+    TIMEOUT = (5, 30)
+
     class API_URL(object):
         # Create a new report or view all reports
         REPORT = '/api/reports'
         # Edit or delete a specific report
         REPORT_ID = '/api/report/'
         # Create a new event or list events
-        EVENT = '/api/events'
\ No newline at end of file
+        EVENT = '/api/events'
@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import threading
+import urllib.parse
+
+import requests
+
+
+def server_key(address):
+    """Key identifying the server an address points at, used to share per-server state"""
+    parsed = urllib.parse.urlsplit(address)
+    return parsed.scheme.lower(), parsed.netloc.lower()
+
+
+class SessionPool(object):
+    """Thread-safe collection of persistent HTTP sessions, one per server. Sessions keep
+    connections alive between requests, so repeated requests to the same server skip the
+    TCP and TLS handshakes.
+
+    Arguments
+    ---------
+    pool_size : int
+        Maximum number of connections kept alive for each server
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, pool_size=10):
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """Pool shared by everything that wasn't given a pool of its own"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def get_session(self, address):
+        """Get the session for the server at `address`, creating it if needed
+
+        Arguments
+        ---------
+        address : string
+            Any URL on the server, only the scheme and host are used
+
+        Returns
+        -------
+        session : requests.Session
+            Session to use for requests to this server
+        """
+        key = server_key(address)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[key] = session
+            return session
+
+    def close(self):
+        """Close every session and their connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
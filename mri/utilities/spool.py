@@ -0,0 +1,136 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import io
+import json
+import logging
+import os
+import threading
+
+
+class Spool(object):
+    """Append-only file of JSON payloads, one per line, used to keep events that could not be
+    sent. Writes are buffered and fsync'd to disk every `sync_every` payloads, and reading
+    streams the file line by line so spools larger than memory can be replayed.
+
+    Arguments
+    ---------
+    path : string
+        File to append payloads to. Created, along with its folder, on first write
+
+    sync_every : int
+        Number of appended payloads between fsyncs
+    """
+    def __init__(self, path, sync_every=100):
+        self.path = path
+        self.sync_every = sync_every
+        self._file = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    def append(self, payload):
+        """Append a single JSON-serializable payload to the spool"""
+        self.extend([payload])
+
+    def extend(self, payloads):
+        """Append several JSON-serializable payloads to the spool"""
+        with self._lock:
+            if self._file is None:
+                folder = os.path.dirname(self.path)
+                if folder and not os.path.isdir(folder):
+                    os.makedirs(folder)
+                self._file = io.open(self.path, 'ab')
+            for payload in payloads:
+                self._file.write(json.dumps(payload).encode('utf-8') + b'\n')
+                self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+
+    def flush(self):
+        """Force everything appended so far to disk"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+
+    def close(self):
+        """Flush and close the spool file"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def __iter__(self):
+        """Stream the spooled payloads without loading the whole file"""
+        self.flush()
+        if not os.path.exists(self.path):
+            return
+        with io.open(self.path, 'rb') as spool_file:
+            for line in spool_file:
+                if line.strip():
+                    yield json.loads(line.decode('utf-8'))
+
+    def replay(self, send_fn, batch_size=1000):
+        """Hand the spooled payloads to `send_fn` in batches. The spool is emptied as batches are
+        accepted; if `send_fn` fails the rest of the spool is kept for a later replay
+
+        Arguments
+        ---------
+        send_fn : callable
+            Called with a list of payloads, returns True if they were delivered
+
+        batch_size : int
+            Maximum number of payloads per call to `send_fn`
+
+        Returns
+        -------
+        sent : int
+            Number of payloads delivered
+        """
+        self.close()
+        if not os.path.exists(self.path):
+            return 0
+        sent = 0
+        with io.open(self.path, 'rb') as spool_file:
+            batch = []
+            for line in spool_file:
+                if not line.strip():
+                    continue
+                batch.append(json.loads(line.decode('utf-8')))
+                if len(batch) >= batch_size:
+                    if not send_fn(batch):
+                        self._keep_remaining(spool_file, batch)
+                        return sent
+                    sent += len(batch)
+                    batch = []
+            if batch:
+                if not send_fn(batch):
+                    self._keep_remaining(spool_file, batch)
+                    return sent
+                sent += len(batch)
+        os.remove(self.path)
+        logging.info('Replayed {0} spooled payloads from {1}'.format(sent, self.path))
+        return sent
+
+    def _keep_remaining(self, spool_file, batch):
+        """Rewrite the spool to hold only the failed batch and whatever follows it"""
+        tmp_path = self.path + '.tmp'
+        with io.open(tmp_path, 'wb') as tmp_file:
+            for payload in batch:
+                tmp_file.write(json.dumps(payload).encode('utf-8') + b'\n')
+            for line in spool_file:
+                tmp_file.write(line)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        # os.replace is atomic on every platform but missing on Python 2
+        getattr(os, 'replace', os.rename)(tmp_path, self.path)
+        logging.warning('Replay of {0} interrupted, remaining payloads kept'.format(self.path))
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
@@ -0,0 +1,110 @@
+"""Encodings for batches of event payloads. The plain format is a JSON list of
+{'type': ..., 'properties': {...}} objects. The columnar format groups consecutive events of the
+same type and with the same property names, and sends each group's names once:
+
+    [{"type": "train.abc", "columns": ["iteration", "loss"], "rows": [[1, 0.5], [2, null]]}]
+
+Every row holds a value for every column, so a null is a property that was explicitly None, as
+in the plain format, and decoding gives back the events in their original order.
+
+Either format may additionally be gzip or deflate compressed. The format is announced with the
+Content-Type and Content-Encoding headers."""
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import json
+import zlib
+
+JSON = 'application/json'
+COLUMNAR = 'application/vnd.mri.columnar+json'
+COMPRESSIONS = ('gzip', 'deflate')
+
+
+def encode_batch(payloads, columnar=False, compression=None):
+    """Encode a batch of event payloads for sending
+
+    Arguments
+    ---------
+    payloads : list
+        Event payloads, as dictionaries with 'type' and 'properties'
+
+    columnar : bool
+        Use the columnar layout instead of a plain list of events
+
+    compression : string
+        None, 'gzip' or 'deflate'
+
+    Returns
+    -------
+    body : bytes
+        Request body
+
+    headers : dict
+        Content-Type and, if compressed, Content-Encoding headers for the body
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError('Unknown compression {0}'.format(compression))
+    headers = {'Content-Type': COLUMNAR if columnar else JSON}
+    body = json.dumps(_to_columns(payloads) if columnar else payloads).encode('utf-8')
+    if compression == 'gzip':
+        # wbits of 16 + MAX_WBITS writes a gzip header and trailer
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        body = compressor.compress(body) + compressor.flush()
+        headers['Content-Encoding'] = 'gzip'
+    elif compression == 'deflate':
+        body = zlib.compress(body)
+        headers['Content-Encoding'] = 'deflate'
+    return body, headers
+
+
+def decode_batch(body, headers):
+    """Decode a request body made by `encode_batch` back into a list of event payloads
+
+    Arguments
+    ---------
+    body : bytes
+        Request body
+
+    headers : dict
+        Request headers, only Content-Type and Content-Encoding are used
+
+    Returns
+    -------
+    payloads : list
+        Event payloads, as dictionaries with 'type' and 'properties'
+    """
+    headers = dict((k.lower(), v) for k, v in headers.items())
+    encoding = headers.get('content-encoding')
+    if encoding == 'gzip':
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif encoding == 'deflate':
+        body = zlib.decompress(body)
+    obj = json.loads(body.decode('utf-8'))
+    if headers.get('content-type', '').startswith(COLUMNAR):
+        return _from_columns(obj)
+    return obj if isinstance(obj, list) else [obj]
+
+
+def _to_columns(payloads):
+    encoded = []
+    group = None
+    for payload in payloads:
+        properties = payload['properties']
+        if group is None or group['type'] != payload['type'] or len(group['columns']) != len(properties) \
+                or any(name not in properties for name in group['columns']):
+            group = {'type': payload['type'], 'columns': list(properties), 'rows': []}
+            encoded.append(group)
+        group['rows'].append([properties[name] for name in group['columns']])
+    return encoded
+
+
+def _from_columns(groups):
+    payloads = []
+    for group in groups:
+        for row in group['rows']:
+            properties = dict(zip(group['columns'], row))
+            payloads.append({'type': group['type'], 'properties': properties})
+    return payloads
@@ -2,5 +2,5 @@ from setuptools import find_packages, setup
 
 setup(
     name='mri',
-    packages=find_packages(exclude=['scripts', 'tests']),
+    packages=find_packages(exclude=['scripts', 'tests', 'benchmarks']),
     version='0.10')
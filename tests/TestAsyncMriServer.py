@@ -0,0 +1,35 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import sys
+import unittest
+
+from tests.stand_in_server import StandInServer
+
+ASYNC = sys.version_info >= (3, 7)
+if ASYNC:
+    import asyncio
+    from tests.async_scenarios import many_dispatches
+
+
+@unittest.skipUnless(ASYNC, 'asyncio.run needs Python 3.7')
+class TestAsyncMriServer(unittest.TestCase):
+    def test_many_dispatches(self):
+        with StandInServer() as stand_in:
+            ids, reports, found, remaining = asyncio.run(many_dispatches(stand_in.address))
+            events = stand_in.events()
+        self.assertEqual(len(set(ids)), 10)
+        self.assertEqual(set(reports), set(ids))
+        self.assertEqual(sorted(found), sorted(ids))
+        self.assertEqual(len(remaining), 9)
+        self.assertEqual(len(events), 50)
+        for task_id in range(10):
+            iterations = [e['properties']['iteration'] for e in events if e['type'] == 'train.{0}'.format(task_id)]
+            self.assertEqual(iterations, list(range(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
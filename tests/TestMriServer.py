@@ -4,10 +4,19 @@ from __future__ import division
 from __future__ import absolute_import
 from future import standard_library
 standard_library.install_aliases()
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 
 from mri import MriServer
 from mri.dispatch import MriServerDispatch
+from mri.event import TrainingEvent
+from mri.utilities import RateLimiter
+from tests.stand_in_server import StandInServer
 
 
 class TestMriServer(unittest.TestCase):
@@ -18,6 +27,175 @@ class TestMriServer(unittest.TestCase):
         test_against = MriServerDispatch(task, "http://www.httpbin.com", "testuser", "testpass")
         self.assertEqual(dispatch, test_against)
 
+    def test_shared_pool(self):
+        server = MriServer("http://www.httpbin.com", "testuser", "testpass", pool_size=4)
+        first = server.new_dispatch({"title": "A", "id": "1"})
+        second = server.new_dispatch({"title": "B", "id": "2"})
+        self.assertIs(first.pool, server.pool)
+        self.assertIs(first.pool.get_session(first.address), second.pool.get_session(second.address))
+
+    def test_replay_spool(self):
+        folder = tempfile.mkdtemp()
+        try:
+            # Server down, events go to the spool
+            dispatch = MriServerDispatch({'title': 'T', 'id': 'abc'}, 'http://127.0.0.1:1', 'u', 'p',
+                                         spool_folder=folder)
+            self.assertIsNone(dispatch.setup_display('iteration', ['iteration', 'loss']))
+            for i in range(5):
+                self.assertIsNone(dispatch.train_event(TrainingEvent({'iteration': i, 'loss': i}, 'iteration')))
+            dispatch.train_finish()
+            path = os.path.join(folder, 'train.abc.spool')
+            with StandInServer() as stand_in:
+                server = MriServer(stand_in.address, 'u', 'p')
+                self.assertEqual(server.replay_spool(path, batch_size=2), 5)
+                events = stand_in.events()
+            self.assertEqual([e['properties']['iteration'] for e in events], list(range(5)))
+            self.assertFalse(os.path.exists(path))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_offline(self):
+        folder = tempfile.mkdtemp()
+        try:
+            with StandInServer() as stand_in:
+                dispatch = MriServerDispatch({'title': 'T', 'id': 'abc'}, stand_in.address, 'u', 'p',
+                                             spool_folder=folder, offline=True)
+                self.assertIsNone(dispatch.setup_display('iteration', ['iteration', 'loss']))
+                dispatch.train_event(TrainingEvent({'iteration': 1, 'loss': 1}, 'iteration'))
+                dispatch.train_finish()
+                self.assertEqual(stand_in.requests, [])
+            self.assertTrue(os.path.exists(os.path.join(folder, 'train.abc.spool')))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_report_cache(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            stand_in.reports['old'] = 'sweep 0'
+            self.assertEqual(server.search_reports('sweep 0'), ['old'])
+            dispatch = server.new_dispatch({'title': 'sweep 1', 'id': 'a'})
+            dispatch.setup_display('iteration', ['iteration', 'loss'])
+            for _ in range(3):
+                self.assertEqual(server.search_reports('sweep', 'prefix'), ['old', dispatch.report_id])
+            server.delete_report('old')
+            self.assertEqual(server.search_reports('sweep', 'substring'), [dispatch.report_id])
+            listings = [r for r in stand_in.requests if r[:2] == ('GET', '/api/reports')]
+        self.assertEqual(len(listings), 1)
+
+    def test_resume_dispatch(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            stand_in.reports['preempted'] = 'long run'
+            dispatch = server.resume_dispatch({'title': 'long run', 'id': 'a'}, resume_after=50)
+            self.assertEqual(dispatch.report_id, 'preempted')
+            self.assertIsNone(dispatch.setup_display('iteration', ['iteration', 'loss']))
+            for i in range(0, 100, 10):
+                dispatch.train_event(TrainingEvent({'iteration': i, 'loss': 1}, 'iteration'))
+            self.assertEqual(dispatch.train_events([TrainingEvent({'iteration': i, 'loss': 1}, 'iteration')
+                                                    for i in (40, 100)]), 1)
+            self.assertEqual([e['properties']['iteration'] for e in stand_in.events()], [60, 70, 80, 90, 100])
+            self.assertEqual(dispatch.metrics.snapshot()['events']['skipped'], 7)
+            self.assertEqual([r[:2] for r in stand_in.requests if r[1] != '/api/events'], [('GET', '/api/reports')])
+
+            fresh = server.resume_dispatch({'title': 'new run', 'id': 'b'})
+            fresh.setup_display('iteration', ['iteration', 'loss'])
+            self.assertTrue(fresh.report_id in stand_in.reports)
+
+    def test_download_events(self):
+        import numpy as np
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            ids = []
+            for n in range(3):
+                dispatch = server.new_dispatch({'title': 'run {0}'.format(n), 'id': str(n)})
+                dispatch.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
+                dispatch.train_events({'iteration': np.arange(25), 'loss': np.arange(25) * (n + 1.0)})
+                dispatch.train_event(TrainingEvent({'iteration': 25, 'accuracy': 0.5}, 'iteration'))
+                ids.append(dispatch.report_id)
+
+            self.assertEqual(len(list(server.iter_events(ids[0], page_size=10))), 26)
+            pages = [r for r in stand_in.requests if r[1].startswith('/api/events?')]
+            self.assertEqual(len(pages), 3)
+
+            data = server.get_events(ids[1], page_size=7)
+            self.assertEqual(sorted(data), ['accuracy', 'iteration', 'loss'])
+            self.assertEqual(list(data['iteration']), list(range(26)))
+            self.assertEqual(data['loss'][24], 48)
+            self.assertTrue(np.isnan(data['loss'][25]) and np.isnan(data['accuracy'][0]))
+
+            dispatch = server.new_dispatch({'title': 'phases', 'id': 'p'})
+            dispatch.setup_display('iteration', ['iteration', 'loss', 'phase'])
+            dispatch.train_event(TrainingEvent({'iteration': 0, 'loss': 1.0}, 'iteration'))
+            dispatch.train_event(TrainingEvent({'iteration': 1, 'loss': 0.5, 'phase': 'warmup'}, 'iteration'))
+            data = server.get_events(dispatch.report_id, attributes=['loss', 'phase'])
+            self.assertEqual(list(data['loss']), [1.0, 0.5])
+            self.assertEqual(data['phase'], [None, 'warmup'])
+
+            many = server.get_events_many(ids, attributes=['loss'])
+            self.assertEqual([float(many[i]['loss'][1]) for i in ids], [1, 2, 3])
+            self.assertRaises(IOError, server.get_events, 'missing')
+
+    def test_delete_reports(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            for n in range(20):
+                stand_in.reports['r{0}'.format(n)] = 'sweep {0}'.format(n) if n < 15 else 'keep {0}'.format(n)
+            results = server.delete_reports(title='sweep', mode='prefix', predicate=lambda i, t: t != 'sweep 0')
+            self.assertEqual(sorted(results), sorted('r{0}'.format(n) for n in range(1, 15)))
+            self.assertTrue(all(r.status_code == 200 for r in results.values()))
+            self.assertEqual(sorted(stand_in.reports), ['r0', 'r15', 'r16', 'r17', 'r18', 'r19'])
+            self.assertEqual(sorted(server.get_reports()), ['r0', 'r15', 'r16', 'r17', 'r18', 'r19'])
+
+            results = server.delete_reports(ids=['r0', 'gone'])
+            self.assertEqual((results['r0'].status_code, results['gone'].status_code), (200, 404))
+            listings = [r for r in stand_in.requests if r[:2] == ('GET', '/api/reports')]
+            self.assertEqual(len(listings), 1)
+            self.assertRaises(ValueError, server.delete_reports)
+
+    def test_rate_limits(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            limiter = server.set_rate_limits(requests_per_second=20, burst=0.05)
+            self.assertIs(limiter, RateLimiter.for_address(stand_in.address))
+            start = time.time()
+            for _ in range(6):
+                server.get_reports(refresh=True)
+            self.assertTrue(time.time() - start >= 0.2)
+            self.assertFalse(server.set_rate_limits().limited)
+
+    def test_delete_new_reports(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            self.assertEqual(server.get_reports(), {})
+            # Created by another client while this one's listing is still cached
+            stand_in.reports['r0'] = 'sweep 0'
+            results = server.delete_reports(title='sweep', mode='prefix')
+            self.assertEqual(list(results), ['r0'])
+            self.assertEqual(stand_in.reports, {})
+
+    def test_provision_dispatches(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            tasks = [{'title': 'sweep {0}'.format(n), 'id': str(n)} for n in range(20)]
+            dispatches = server.provision_dispatches(tasks, 'iteration', ['iteration', 'loss'], max_workers=5)
+            self.assertEqual([d.task_params for d in dispatches], tasks)
+            self.assertEqual(sorted(stand_in.configs), sorted(d.report_id for d in dispatches))
+            self.assertEqual(stand_in.configs[dispatches[3].report_id]['visualizations'][0]['eventName'], 'train.3')
+
+            dispatch = server.new_dispatch({'title': 'background', 'id': 'bg'})
+            self.assertIsNone(dispatch.setup_display('iteration', ['iteration', 'loss'], background=True))
+            dispatch.train_event(TrainingEvent({'iteration': 1, 'loss': 1}, 'iteration'))
+            dispatch.train_finish()
+            self.assertTrue(dispatch.report_id in stand_in.configs)
+            self.assertEqual(dispatch.wait_setup().status_code, 200)
+            self.assertEqual(len(stand_in.events()), 1)
+
+    def test_lazy_imports(self):
+        script = ("import sys, mri; mri.MriServer('http://localhost:1', 'u', 'p').new_dispatch({'id': '1'}); "
+                  "print([m for m in ('matplotlib', 'numpy', 'asyncio') if m in sys.modules])")
+        output = subprocess.check_output([sys.executable, '-c', script]).decode('utf-8')
+        self.assertEqual(output.strip(), '[]')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,26 @@
+"""Coroutines for the asyncio tests. Kept out of the test modules since `async def` doesn't parse
+before Python 3.5, only import this on Python 3.7+"""
+import asyncio
+
+from mri import AsyncMriServer
+from mri.event import TrainingEvent
+
+
+async def run_dispatch(server, task):
+    dispatch = server.new_dispatch(task)
+    await dispatch.setup_display('iteration', ['iteration', 'loss'])
+    await asyncio.gather(*[dispatch.train_event(TrainingEvent({'iteration': i, 'loss': i}, 'iteration'))
+                           for i in range(5)])
+    await dispatch.train_finish()
+    return dispatch.report_id
+
+
+async def many_dispatches(address):
+    server = AsyncMriServer(address, 'u', 'p', max_in_flight=4)
+    ids = await asyncio.gather(*[run_dispatch(server, {'title': 'T', 'id': str(i)}) for i in range(10)])
+    reports = await server.get_reports()
+    found = await server.search_reports('T')
+    await server.delete_report(ids[0])
+    remaining = await server.get_reports()
+    server.close()
+    return ids, reports, found, remaining
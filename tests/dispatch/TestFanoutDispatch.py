@@ -0,0 +1,62 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from builtins import super
+from future import standard_library
+standard_library.install_aliases()
+import threading
+import unittest
+
+from mri.dispatch import FanoutDispatch
+from tests.dispatch.TestReduceDispatch import RecordingDispatch
+from mri.event import TrainingEvent
+
+
+class StalledDispatch(RecordingDispatch):
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def train_events(self, events):
+        self.gate.wait()
+        super().train_events(events)
+
+
+class FailingDispatch(RecordingDispatch):
+    def train_events(self, events):
+        raise RuntimeError('backend down')
+
+
+class TestFanoutDispatch(unittest.TestCase):
+    def _send(self, dispatch):
+        dispatch.setup_display('iteration', ['iteration', 'loss'])
+        for i in range(50):
+            dispatch.train_event(TrainingEvent({'iteration': i, 'loss': i}, 'iteration'))
+
+    def test_fanout(self):
+        fast, stalled, failing = RecordingDispatch(), StalledDispatch(), FailingDispatch()
+        dispatch = FanoutDispatch([fast, stalled, failing], queue_size=100, linger=0)
+        self._send(dispatch)
+        stalled.gate.set()
+        dispatch.train_finish()
+        stats = dispatch.stats()
+        self.assertEqual(len(fast.events), 50)
+        self.assertEqual(len(stalled.events), 50)
+        self.assertEqual([s['sent'] for s in stats], [50, 50, 0])
+        self.assertTrue(stats[2]['errors'] > 0)
+        self.assertTrue(all(d.finished for d in (fast, stalled, failing)))
+
+    def test_drops(self):
+        stalled = StalledDispatch()
+        dispatch = FanoutDispatch([stalled], queue_size=5, batch_size=1, linger=0)
+        self._send(dispatch)
+        stalled.gate.set()
+        dispatch.train_finish()
+        stats = dispatch.stats()[0]
+        self.assertTrue(stats['dropped'] > 0)
+        self.assertEqual(len(stalled.events) + stats['dropped'], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
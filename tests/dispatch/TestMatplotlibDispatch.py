@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from mri.dispatch import MatplotlibDispatch
+from mri.dispatch.MatplotlibDispatch import _import_backend
+from mri.event import TrainingEvent
+
+
+@unittest.skipUnless(_import_backend(), 'Matplotlib and Numpy are required')
+class TestMatplotlibDispatch(unittest.TestCase):
+    def setUp(self):
+        import matplotlib
+        matplotlib.use('Agg')
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_incremental(self):
+        dispatch = MatplotlibDispatch({'title': 'incremental test'}, self.folder, incremental=True, fps=1000)
+        dispatch.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
+        for i in range(3000):
+            dispatch.train_event(TrainingEvent({'iteration': i, 'loss': 10 - i, 'accuracy': i / 10.0}, 'iteration'))
+        loss = dispatch._data['loss']
+        self.assertEqual(loss.size, 3000)
+        self.assertEqual((loss.min, loss.max), (10 - 2999, 10))
+        self.assertEqual(list(dispatch._lines['accuracy'].get_xdata()[:3]), [0, 1, 2])
+        with_legend = dispatch._legend.get_texts()[0].get_text()
+        self.assertTrue('Max: 10.0000' in with_legend)
+        dispatch.train_finish()
+        self.assertTrue(os.path.exists(os.path.join(self.folder, 'incremental_test')))
+
+    def test_train_events(self):
+        import numpy as np
+        for incremental in (False, True):
+            dispatch = MatplotlibDispatch({'title': 'bulk test'}, self.folder, incremental=incremental)
+            dispatch.setup_display('iteration', ['iteration', 'loss'])
+            data = np.column_stack([np.arange(100), np.linspace(1, 0, 100)])
+            self.assertEqual(dispatch.train_events(data), 100)
+            self.assertEqual(len(dispatch._legend_keys), 1)
+            self.assertTrue('Max: 1.0000' in dispatch._legend_keys[0])
+            dispatch.train_finish()
+
+    def test_concurrent_background(self):
+        dispatches = [MatplotlibDispatch({'title': 'task {}'.format(n)}, self.folder, incremental=n % 2 == 0,
+                                         fps=100, background=True) for n in range(4)]
+
+        def train(dispatch, scale):
+            dispatch.setup_display('iteration', ['iteration', 'loss'])
+            for i in range(500):
+                dispatch.train_event(TrainingEvent({'iteration': i, 'loss': scale * i}, 'iteration'))
+            dispatch.train_finish()
+
+        threads = [threading.Thread(target=train, args=(d, n + 1)) for n, d in enumerate(dispatches)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for n, dispatch in enumerate(dispatches):
+            self.assertIsNone(dispatch._worker)
+            self.assertEqual(dispatch._figure.axes[0].get_title(), 'task {}'.format(n))
+            self.assertTrue('Max: {:0.4f}'.format(499.0 * (n + 1)) in dispatch._legend_keys[0])
+            self.assertTrue(os.path.exists(os.path.join(self.folder, 'task_{}'.format(n))))
+
+    def test_snapshots_and_resume(self):
+        import numpy as np
+        image = os.path.join(self.folder, 'snapshot_test')
+        dispatch = MatplotlibDispatch({'title': 'snapshot test'}, self.folder, incremental=True,
+                                      snapshot_every=100, save_data=True)
+        dispatch.setup_display('iteration', ['iteration', 'loss'])
+        for i in range(150):
+            dispatch.train_event(TrainingEvent({'iteration': i, 'loss': i / 10.0}, 'iteration'))
+        # Saved after the 100th event, without leftover temporary files
+        self.assertTrue(os.path.exists(image))
+        self.assertEqual(sorted(os.listdir(self.folder)), ['snapshot_test', 'snapshot_test.npz'])
+        with np.load(image + '.npz') as saved:
+            self.assertEqual(len(saved['times:loss']), 100)
+        dispatch.train_finish()
+
+        for incremental in (True, False):
+            resumed = MatplotlibDispatch({'title': 'snapshot test'}, self.folder, incremental=incremental,
+                                         resume=True)
+            resumed.setup_display('iteration', ['iteration', 'loss'])
+            resumed.train_event(TrainingEvent({'iteration': 150, 'loss': 15.0}, 'iteration'))
+            self.assertTrue('Max: 15.0000' in resumed._legend_keys[0])
+            loss = resumed._data['loss']
+            self.assertEqual(loss.size if incremental else len(loss), 151)
+            if incremental:
+                self.assertEqual((loss.min, loss.max), (0.0, 15.0))
+                self.assertEqual(list(loss.times[148:]), [148, 149, 150])
+            resumed.train_finish()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,12 +4,16 @@ from __future__ import division
 from __future__ import absolute_import
 from future import standard_library
 standard_library.install_aliases()
+import os
+import shutil
+import tempfile
 import unittest
 import json
 
 from mri.dispatch import MriServerDispatch
 from mri.event import TrainingEvent
 from mri.utilities import ServerConsts
+from tests.stand_in_server import StandInServer
 
 HTTP_BIN = 'http://httpbin.org'
 
@@ -71,12 +75,13 @@ class TestMriServerDispatch(unittest.TestCase):
         ServerConsts.API_URL.REPORT = '/post'
 
         # Test
-        result = server.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
-        obj = json.loads(result.text)['json']
-
-        # Restore states
-        ServerConsts.API_URL.REPORT = old
-        ServerConsts.API_URL.REPORT_ID = old_id
+        try:
+            result = server.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
+            obj = json.loads(result.text)['json']
+        finally:
+            # Restore states
+            ServerConsts.API_URL.REPORT = old
+            ServerConsts.API_URL.REPORT_ID = old_id
 
         self.assertEqual('big', obj['visualizations'][0]['configuration']['size'])
         self.assertEqual('train.cbdcig', obj['visualizations'][0]['eventName'])
@@ -100,5 +105,115 @@ class TestMriServerDispatch(unittest.TestCase):
         )
         self.assertEqual(data, correct)
 
+    def test_asynchronous_train_event(self):
+        with StandInServer() as stand_in:
+            server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, stand_in.address, 'test', 'tester',
+                                       asynchronous=True, batch_size=4, linger=5)
+            server.setup_display('iteration', ['iteration', 'loss'])
+            for i in range(10):
+                self.assertIsNone(server.train_event(TrainingEvent({'iteration': i, 'loss': -i}, 'iteration')))
+            server.train_finish()
+            events = stand_in.events()
+        self.assertEqual([e['properties']['iteration'] for e in events], list(range(10)))
+        self.assertEqual(events[0]['type'], 'train.abcde')
+        posts = [r for r in stand_in.requests if r[1] == '/api/events']
+        self.assertEqual(len(posts), 3)
+
+    def test_asynchronous_failures(self):
+        with StandInServer() as stand_in:
+            stand_in.respond = lambda method, path, body, headers: (500, {'error': 'broken'})
+            server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, stand_in.address, 'test', 'tester',
+                                       asynchronous=True, batch_size=5, linger=5)
+            server.setup_display('iteration', ['iteration', 'loss'])
+            for i in range(10):
+                server.train_event(TrainingEvent({'iteration': i, 'loss': -i}, 'iteration'))
+            server.train_finish()
+        self.assertEqual(server._sender.stats()['sent'], 0)
+        self.assertEqual(server._sender.stats()['errors'], 2)
+
+    def test_failed_events(self):
+        folder = tempfile.mkdtemp()
+        try:
+            for status, spooled, dropped in ((503, 3, 0), (400, 0, 3)):
+                with StandInServer() as stand_in:
+                    stand_in.respond = lambda method, path, body, headers: (status, {'error': 'failed'})
+                    server = MriServerDispatch({'title': 'test', 'id': str(status)}, stand_in.address, 'test',
+                                               'tester', spool_folder=folder, retries=0)
+                    server.setup_display('iteration', ['iteration', 'loss'])
+                    for i in range(3):
+                        server.train_event(TrainingEvent({'iteration': i, 'loss': -i}, 'iteration'))
+                    server.train_finish()
+                events = server.metrics.snapshot()['events']
+                self.assertEqual((events['sent'], events['spooled'], events['dropped']), (0, spooled, dropped))
+                self.assertTrue(os.path.exists(os.path.join(folder, 'train.503.spool')))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_train_events(self):
+        with StandInServer() as stand_in:
+            server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, stand_in.address, 'test', 'tester')
+            server.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
+            columns = {'iteration': list(range(25)), 'loss': [float(i) for i in range(25)]}
+            self.assertEqual(server.train_events(columns, chunk_size=10), 25)
+            buf = server.new_buffer()
+            buf.append({'iteration': 25, 'accuracy': 0.5})
+            self.assertEqual(server.train_events(buf), 1)
+            self.assertEqual(server.train_events(iter([TrainingEvent({'iteration': 26, 'loss': 1}, 'iteration')])), 1)
+            with self.assertRaises(ValueError):
+                server.train_events({'iteration': [1], 'unknown': [2]})
+            events = stand_in.events()
+        self.assertEqual([e['properties']['iteration'] for e in events], list(range(27)))
+        self.assertEqual(events[25]['properties'], {'iteration': 25, 'accuracy': 0.5})
+        posts = [r for r in stand_in.requests if r[1] == '/api/events']
+        self.assertEqual(len(posts), 5)
+
+    def test_compact_batches(self):
+        for columnar, compression in ((True, None), (False, 'gzip'), (True, 'deflate')):
+            with StandInServer() as stand_in:
+                server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, stand_in.address, 'test', 'tester',
+                                           columnar=columnar, compression=compression)
+                server.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
+                server.train_events({'iteration': [1, 2], 'loss': [0.5, None], 'accuracy': [0.1, 0.2]})
+                events = stand_in.events()
+                headers = stand_in.requests[-1][2]
+            self.assertEqual(events[1], {'type': 'train.abcde', 'properties': {'iteration': 2, 'accuracy': 0.2}})
+            self.assertEqual(headers.get('Content-Encoding'), compression)
+
+    def test_compact_fallback(self):
+        with StandInServer(accept_compact=False) as stand_in:
+            server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, stand_in.address, 'test', 'tester',
+                                       columnar=True, compression='gzip')
+            server.setup_display('iteration', ['iteration', 'loss'])
+            server.train_events({'iteration': [1, 2], 'loss': [0.5, 0.25]})
+            server.train_events({'iteration': [3], 'loss': [0.125]})
+            self.assertEqual(len(stand_in.events()), 3)
+            self.assertEqual([r[4] for r in stand_in.requests if r[1] == '/api/events'], [415, 200, 200])
+        self.assertFalse(server.columnar)
+
+    def test_single_event_fallback(self):
+        with StandInServer(accept_batches=False) as stand_in:
+            server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, stand_in.address, 'test', 'tester')
+            server.setup_display('iteration', ['iteration', 'loss'])
+            server.train_events({'iteration': [1, 2], 'loss': [0.5, 0.25]})
+            server.train_events({'iteration': [3], 'loss': [0.125]})
+            self.assertEqual(len(stand_in.events()), 3)
+            self.assertEqual([r[4] for r in stand_in.requests if r[1] == '/api/events'], [400, 200, 200, 200])
+        events = server.metrics.snapshot()['events']
+        self.assertEqual((events['sent'], events['dropped']), (3, 0))
+
+    def test_offline_background_batches(self):
+        folder = tempfile.mkdtemp()
+        try:
+            server = MriServerDispatch({'title': 'test', 'id': 'abcde'}, 'http://localhost:1', 'test', 'tester',
+                                       asynchronous=True, spool_folder=folder, offline=True)
+            server.setup_display('iteration', ['iteration', 'loss'])
+            server.train_events({'iteration': [1, 2], 'loss': [0.5, 0.25]})
+            server.train_finish()
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(server._sender.stats()['errors'], 0)
+        self.assertEqual(server.metrics.snapshot()['events']['spooled'], 2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from builtins import super
+from future import standard_library
+standard_library.install_aliases()
+import unittest
+
+from mri.dispatch import ReduceDispatch
+from mri.dispatch.BaseDispatch import BaseDispatch
+from mri.event import TrainingEvent
+from mri.utilities.reducers import EveryNth, Window
+
+
+class RecordingDispatch(BaseDispatch):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.finished = False
+
+    def train_event(self, event):
+        super().train_event(event)
+        self.events.append(event.attributes)
+
+    def train_events(self, events):
+        for event in self._iter_events(events):
+            self.events.append(event.attributes)
+
+    def train_finish(self):
+        super().train_finish()
+        self.finished = True
+
+
+class TestReduceDispatch(unittest.TestCase):
+    def test_reduce(self):
+        child = RecordingDispatch()
+        dispatch = ReduceDispatch(child, {'loss': Window(4), 'lr': EveryNth(5)})
+        dispatch.setup_display('iteration', ['iteration', 'loss', 'lr', 'accuracy'])
+        for i in range(10):
+            dispatch.train_event(TrainingEvent({'iteration': i, 'loss': i, 'lr': 1, 'accuracy': i}, 'iteration'))
+        dispatch.train_finish()
+        self.assertTrue(child.finished)
+        self.assertEqual(len([e for e in child.events if 'accuracy' in e]), 10)
+        self.assertEqual([(e['iteration'], e['loss']) for e in child.events if 'loss' in e],
+                         [(3, 1.5), (7, 5.5), (9, 8.5)])
+        self.assertEqual([e['iteration'] for e in child.events if 'lr' in e], [0, 5, 9])
+
+    def test_bulk(self):
+        child = RecordingDispatch()
+        dispatch = ReduceDispatch(child, {'loss': EveryNth(10)})
+        dispatch.setup_display('iteration', ['iteration', 'loss'])
+        dispatch.train_events({'iteration': list(range(100)), 'loss': list(range(100))})
+        self.assertEqual([e['iteration'] for e in child.events], list(range(0, 100, 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
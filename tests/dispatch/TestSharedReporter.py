@@ -0,0 +1,73 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import multiprocessing
+import unittest
+
+from mri.dispatch import SharedReporter
+from mri.event import TrainingEvent
+from tests.dispatch.TestReduceDispatch import RecordingDispatch
+
+
+def worker(client, steps):
+    for i in range(steps):
+        client.train_event(TrainingEvent({'iteration': i, 'loss': float(client.rank + i)}, 'iteration'))
+    client.train_finish()
+
+
+class TestSharedReporter(unittest.TestCase):
+    def _run(self, reduce, world_size=3, steps=5):
+        dispatch = RecordingDispatch()
+        reporter = SharedReporter(dispatch, world_size, reduce)
+        reporter.setup_display('iteration', ['iteration', 'loss'])
+        workers = [multiprocessing.Process(target=worker, args=(reporter.client(rank), steps))
+                   for rank in range(world_size)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        reporter.train_finish(timeout=10)
+        self.assertTrue(dispatch.finished)
+        return dispatch.events
+
+    def test_forward(self):
+        events = self._run(None)
+        self.assertEqual(len(events), 15)
+
+    def test_mean(self):
+        events = self._run('mean')
+        self.assertEqual(events, [{'iteration': i, 'loss': i + 1.0} for i in range(5)])
+
+    def test_sum(self):
+        events = self._run('sum', world_size=2, steps=2)
+        self.assertEqual(events, [{'iteration': 0, 'loss': 1.0}, {'iteration': 1, 'loss': 3.0}])
+
+    def test_client(self):
+        reporter = SharedReporter(RecordingDispatch(), 1)
+        with self.assertRaises(ValueError):
+            reporter.client(0)
+        reporter.setup_display('iteration', ['iteration', 'loss'])
+        client = reporter.client(0)
+        with self.assertRaises(ValueError):
+            client.train_event(TrainingEvent({'epoch': 1, 'loss': 1}, 'epoch'))
+        client.train_finish()
+        reporter.train_finish(timeout=10)
+
+    def test_worker_died(self):
+        dispatch = RecordingDispatch()
+        reporter = SharedReporter(dispatch, 2, 'mean')
+        reporter.setup_display('iteration', ['iteration', 'loss'])
+        client = reporter.client(0)
+        client.train_event(TrainingEvent({'iteration': 0, 'loss': 'nan'}, 'iteration'))
+        client.train_event(TrainingEvent({'iteration': 1, 'loss': 1.0}, 'iteration'))
+        client.train_finish()
+        reporter.train_finish(timeout=0.5)
+        self.assertTrue(dispatch.finished)
+        self.assertEqual(dispatch.events, [{'iteration': 1, 'loss': 1.0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
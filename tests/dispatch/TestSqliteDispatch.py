@@ -0,0 +1,77 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import os
+import shutil
+import tempfile
+import unittest
+
+from mri.dispatch import SqliteDispatch
+from mri.event import TrainingEvent
+from mri.utilities import EventStore
+
+
+class TestSqliteDispatch(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'runs', 'metrics.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_store_and_query(self):
+        import numpy as np
+        dispatch = SqliteDispatch({'title': 'local run', 'id': 'a'}, self.path, batch_size=50)
+        dispatch.setup_display('iteration', ['iteration', 'loss', 'accuracy'])
+        for i in range(100):
+            attributes = {'iteration': i, 'loss': 100 - i}
+            if i % 10 == 0:
+                attributes['accuracy'] = i / 100.0
+            dispatch.train_event(TrainingEvent(attributes, 'iteration'))
+        dispatch.train_events({'iteration': np.arange(100, 200), 'loss': np.zeros(100)})
+
+        # Readable from another connection while the run is going
+        reader = EventStore(self.path)
+        self.assertEqual(reader.reports()['a']['title'], 'local run')
+        dispatch.store.flush()
+        data = reader.query('a', start=5, stop=20)
+        self.assertEqual(list(data['iteration']), list(range(5, 21)))
+        self.assertEqual(data['loss'][0], 95)
+        self.assertEqual(list(np.flatnonzero(~np.isnan(data['accuracy']))), [5, 15])
+        reader.close()
+
+        dispatch.train_finish()
+        data = SqliteDispatch({'id': 'a'}, self.path).query(['loss'], start=150)
+        self.assertEqual(sorted(data), ['iteration', 'loss'])
+        self.assertEqual(len(data['loss']), 50)
+
+    def test_shared_store(self):
+        store = EventStore(self.path)
+        for report in ('a', 'b'):
+            dispatch = SqliteDispatch({'title': report, 'id': report}, store=store)
+            dispatch.setup_display('epoch', ['epoch', 'acc'])
+            dispatch.train_event(TrainingEvent({'epoch': 1, 'acc': 0.5}, 'epoch'))
+            dispatch.train_event(TrainingEvent({'epoch': 1, 'acc': 0.7}, 'epoch'))
+            dispatch.train_finish()
+        self.assertEqual(sorted(store.reports()), ['a', 'b'])
+        self.assertEqual(list(store.query('b')['acc']), [0.7])
+        self.assertRaises(KeyError, store.query, 'c')
+        store.close()
+
+    def test_rejects_non_numeric(self):
+        dispatch = SqliteDispatch({'title': 'local run', 'id': 'a'}, self.path)
+        with self.assertRaises(ValueError):
+            dispatch.train_finish()
+        dispatch.setup_display('iteration', ['iteration', 'loss', 'phase'])
+        with self.assertRaises(ValueError):
+            dispatch.train_event(TrainingEvent({'iteration': 1, 'loss': 0.5, 'phase': 'warmup'}, 'iteration'))
+        dispatch.train_event(TrainingEvent({'iteration': 2, 'loss': 0.25}, 'iteration'))
+        dispatch.train_finish()
+        self.assertEqual(list(SqliteDispatch({'id': 'a'}, self.path).query(['loss'])['iteration']), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
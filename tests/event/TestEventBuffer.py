@@ -0,0 +1,61 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import math
+import unittest
+
+from mri.dispatch.BaseDispatch import BaseDispatch
+from mri.event import EventBuffer, TrainingEvent
+
+
+class TestEventBuffer(unittest.TestCase):
+    def test_columns(self):
+        buf = EventBuffer('iteration', ['iteration', 'loss', 'accuracy'], typecodes={'iteration': 'l'})
+        buf.append({'iteration': 1, 'loss': 0.5, 'accuracy': 0.1})
+        buf.append({'iteration': 2, 'loss': 0.25})
+        buf.append_row([3, 0.125, None])
+        self.assertEqual(len(buf), 3)
+        self.assertEqual(list(buf.column('iteration')), [1, 2, 3])
+        self.assertEqual(buf.column('iteration').typecode, 'l')
+        self.assertTrue(math.isnan(buf.column('accuracy')[1]))
+        self.assertEqual(list(buf)[1], TrainingEvent({'iteration': 2, 'loss': 0.25}, 'iteration'))
+        buf.clear()
+        self.assertEqual(len(buf), 0)
+
+    def test_reported_nan(self):
+        buf = EventBuffer('iteration', ['iteration', 'loss', 'accuracy'])
+        buf.append({'iteration': 1, 'loss': float('nan')})
+        loss, accuracy = buf.row(0)[1:]
+        self.assertTrue(math.isnan(loss))
+        self.assertIsNone(accuracy)
+        self.assertEqual(set(next(iter(buf)).attributes), {'iteration', 'loss'})
+
+    def test_validation(self):
+        buf = EventBuffer('iteration', ['iteration', 'loss'], typecodes={'iteration': 'l'})
+        with self.assertRaises(ValueError):
+            buf.append({'iteration': 1, 'unknown': 2})
+        with self.assertRaises(ValueError):
+            buf.append({'loss': 2})
+        with self.assertRaises(ValueError):
+            buf.append({'iteration': 1})
+        with self.assertRaises(ValueError):
+            buf.append_row([1])
+        with self.assertRaises(ValueError):
+            EventBuffer('iteration', ['loss', 'accuracy'])
+        self.assertEqual(len(buf), 0)
+
+    def test_dispatch_schema(self):
+        dispatch = BaseDispatch()
+        dispatch.setup_display('epoch', ['epoch', 'loss'])
+        buf = dispatch.new_buffer()
+        self.assertEqual(buf.attributes, ('epoch', 'loss'))
+        buf.extend([TrainingEvent({'epoch': 1, 'loss': 2}, 'epoch')])
+        with self.assertRaises(ValueError):
+            buf.extend([TrainingEvent({'iteration': 1, 'loss': 2}, 'iteration')])
+
+
+if __name__ == '__main__':
+    unittest.main()
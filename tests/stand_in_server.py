@@ -0,0 +1,121 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import object
+import json
+import socketserver
+import urllib.parse
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from mri.utilities import wire_format
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep connections open between requests, like a real server, so reuse can be observed
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.stand_in.lock:
+            self.server.stand_in.connections += 1
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        stand_in = self.server.stand_in
+        with stand_in.lock:
+            status, reply = stand_in.respond(self.command, self.path, body, self.headers)
+            stand_in.requests.append((self.command, self.path, dict(self.headers), body, status))
+        data = json.dumps(reply).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StandInServer(object):
+    """Minimal in-process stand-in for Mri-server. Records every request it receives and keeps
+    just enough report state to answer the calls the client makes. Event batches may use any
+    encoding from `mri.utilities.wire_format`, unless `accept_compact` is False in which case
+    anything but plain JSON is refused with 415. If `accept_batches` is False, lists of events
+    are refused with 400 and events have to be posted one at a time. `connections` counts the
+    connections accepted"""
+    def __init__(self, accept_compact=True, accept_batches=True):
+        self.accept_compact = accept_compact
+        self.accept_batches = accept_batches
+        self.requests = []
+        self.connections = 0
+        self.reports = {}
+        self.configs = {}
+        self.lock = threading.Lock()
+        self._next_id = 0
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.stand_in = self
+        self.address = 'http://127.0.0.1:{0}'.format(self._server.server_address[1])
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, method, path, body, headers):
+        if not self.accept_compact and (headers.get('Content-Encoding') or
+                                        headers.get('Content-Type') != wire_format.JSON):
+            return 415, {'error': 'unsupported media type'}
+        if method == 'POST' and path == '/api/events' and not self.accept_batches and \
+                isinstance(json.loads(body.decode('utf-8')), list):
+            return 400, {'error': 'expected a single event'}
+        if method == 'POST' and path == '/api/reports':
+            self._next_id += 1
+            report_id = 'report{0}'.format(self._next_id)
+            self.reports[report_id] = json.loads(body.decode('utf-8'))['title']
+            return 200, {'id': report_id}
+        if method == 'GET' and path == '/api/reports':
+            return 200, [{'id': k, 'title': v} for k, v in self.reports.items()]
+        if method == 'PUT' and path.startswith('/api/report/'):
+            self.configs[path[len('/api/report/'):]] = json.loads(body.decode('utf-8'))
+        if method == 'GET' and path.startswith('/api/report/'):
+            report_id = path[len('/api/report/'):]
+            if report_id not in self.configs:
+                return 404, {'error': 'not found'}
+            return 200, dict(self.configs[report_id], id=report_id)
+        if method == 'GET' and path.startswith('/api/events?'):
+            query = dict(urllib.parse.parse_qsl(path.split('?', 1)[1]))
+            skip = int(query.get('skip', 0))
+            matching = [e for e in self._posted_events() if e['type'] == query['type']]
+            return 200, matching[skip:skip + int(query.get('limit', 100))]
+        if method == 'DELETE' and path.startswith('/api/report/'):
+            if self.reports.pop(path[len('/api/report/'):], None) is None:
+                return 404, {'error': 'not found'}
+        return 200, {}
+
+    def events(self):
+        """Every event object posted to the events endpoint, in order"""
+        with self.lock:
+            return self._posted_events()
+
+    def _posted_events(self):
+        events = []
+        for method, path, headers, body, status in self.requests:
+            if method == 'POST' and path == '/api/events' and status == 200:
+                events.extend(wire_format.decode_batch(body, headers))
+        return events
@@ -0,0 +1,59 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import threading
+import unittest
+
+from mri.utilities import BatchSender
+
+
+class TestBatchSender(unittest.TestCase):
+    def test_batches(self):
+        batches = []
+        sender = BatchSender(batches.append, batch_size=10, linger=5)
+        for i in range(25):
+            sender.put(i)
+        sender.close()
+        self.assertEqual([i for b in batches for i in b], list(range(25)))
+        self.assertTrue(all(len(b) <= 10 for b in batches))
+        self.assertEqual(sender.stats()['sent'], 25)
+
+    def test_linger(self):
+        batches = []
+        sender = BatchSender(batches.append, batch_size=100, linger=0.01)
+        sender.put(1)
+        sender.flush()
+        self.assertEqual(batches, [[1]])
+        sender.close()
+
+    def test_drop_when_full(self):
+        gate = threading.Event()
+        sender = BatchSender(lambda batch: gate.wait(), batch_size=1, linger=0, queue_size=1, block=False)
+        results = [sender.put(i) for i in range(5)]
+        self.assertFalse(all(results))
+        self.assertEqual(sender.dropped, results.count(False))
+        gate.set()
+        sender.close()
+
+    def test_send_errors(self):
+        def fail(batch):
+            raise RuntimeError('boom')
+        sender = BatchSender(fail, linger=0)
+        sender.put(1)
+        sender.close()
+        self.assertEqual(sender.errors, 1)
+        with self.assertRaises(ValueError):
+            sender.put(2)
+
+    def test_failed_batches(self):
+        sender = BatchSender(lambda batch: batch[0] % 2 == 0, batch_size=1, linger=0)
+        for i in range(5):
+            sender.put(i)
+        sender.close()
+        self.assertEqual((sender.sent, sender.errors), (3, 2))
+
+if __name__ == '__main__':
+    unittest.main()
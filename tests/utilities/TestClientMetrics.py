@@ -0,0 +1,62 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import json
+import os
+import tempfile
+import unittest
+
+from mri import MriServer
+from mri.event import TrainingEvent
+from mri.utilities import ClientMetrics
+from tests.stand_in_server import StandInServer
+
+
+class TestClientMetrics(unittest.TestCase):
+    def test_percentiles(self):
+        metrics = ClientMetrics()
+        for i in range(1, 101):
+            metrics.record_request('POST /api/events', i / 1000.0, 10, 200 if i % 10 else 503)
+        metrics.count_events('sent', 5)
+        snapshot = metrics.snapshot()
+        endpoint = snapshot['requests']['POST /api/events']
+        self.assertEqual(endpoint['count'], 100)
+        self.assertEqual(endpoint['bytes'], 1000)
+        self.assertEqual(endpoint['errors'], 10)
+        self.assertEqual((endpoint['p50'], endpoint['p95'], endpoint['p99']), (0.051, 0.096, 0.1))
+        self.assertEqual(snapshot['events']['sent'], 5)
+        metrics.reset()
+        snapshot = metrics.snapshot()
+        snapshot.pop('elapsed')
+        fresh = ClientMetrics().snapshot()
+        fresh.pop('elapsed')
+        self.assertEqual(snapshot, fresh)
+
+    def test_dispatch_metrics(self):
+        with StandInServer() as stand_in:
+            server = MriServer(stand_in.address, 'u', 'p')
+            dispatch = server.new_dispatch({'title': 'T', 'id': 'a'})
+            dispatch.setup_display('iteration', ['iteration', 'loss'])
+            for i in range(10):
+                dispatch.train_event(TrainingEvent({'iteration': i, 'loss': i}, 'iteration'))
+            server.get_reports(refresh=True)
+        snapshot = server.metrics.snapshot()
+        self.assertEqual(snapshot['requests']['POST /api/events']['count'], 10)
+        self.assertEqual(snapshot['requests']['GET /api/reports']['count'], 1)
+        self.assertEqual(snapshot['events']['sent'], 10)
+        self.assertEqual(snapshot['timings']['train_event']['count'], 10)
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            server.metrics.dump(path)
+            with open(path) as dumped:
+                self.assertEqual(json.load(dumped)['events']['sent'], 10)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mri.utilities import LogTailer
+from tests.dispatch.TestReduceDispatch import RecordingDispatch
+
+CAFFE = r'Iteration (?P<iteration>\d+), loss = (?P<loss>\S+)'
+
+
+class TestLogTailer(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.log = os.path.join(self.folder, 'train.log')
+        self.offset = os.path.join(self.folder, 'train.offset')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, text, mode='a'):
+        with open(self.log, mode) as f:
+            f.write(text)
+
+    def test_regex_and_partial_lines(self):
+        tailer = LogTailer(self.log, 'iteration', CAFFE)
+        self.assertEqual(tailer.read(), [])
+        self.write('Solving...\nIteration 0, loss = 2.5\nIteration 10, loss = 1')
+        self.assertEqual([e.attributes for e in tailer.read()], [{'iteration': 0, 'loss': 2.5}])
+        self.write('.5\n')
+        self.assertEqual([e.attributes for e in tailer.read()], [{'iteration': 10, 'loss': 1.5}])
+        self.assertEqual(tailer.read(), [])
+        self.write(''.join('Iteration {0}, loss = 1\n'.format(i) for i in range(20, 60, 10)))
+        self.assertEqual([e.attributes['iteration'] for e in tailer.read(max_events=3)], [20, 30, 40])
+        self.assertEqual([e.attributes['iteration'] for e in tailer.read()], [50])
+        tailer.close()
+
+    def test_restart_rotation_and_truncation(self):
+        self.write(''.join(json.dumps({'epoch': i, 'acc': i / 10.0}) + '\n' for i in range(3)))
+        tailer = LogTailer(self.log, 'epoch', offset_path=self.offset)
+        self.assertEqual(len(tailer.read()), 3)
+        tailer.save_offset()
+        tailer.close()
+
+        # A restarted tailer only sees new lines
+        self.write(json.dumps({'epoch': 3, 'acc': 0.3}) + '\nnot json\n')
+        tailer = LogTailer(self.log, 'epoch', offset_path=self.offset)
+        self.assertEqual([e.attributes['epoch'] for e in tailer.read()], [3])
+
+        # Rotation: the rest of the old file is read, then the new file from the start
+        self.write(json.dumps({'epoch': 4, 'acc': 0.4}) + '\n')
+        os.rename(self.log, self.log + '.1')
+        self.write(json.dumps({'epoch': 5, 'acc': 0.5}) + '\n')
+        self.assertEqual([e.attributes['epoch'] for e in tailer.read()], [4, 5])
+
+        # Truncation in place
+        self.write(json.dumps({'epoch': 0, 'acc': 0}) + '\n', mode='w')
+        self.assertEqual([e.attributes['epoch'] for e in tailer.read()], [0])
+        tailer.close()
+
+    def test_follow(self):
+        self.write(''.join('Iteration {0}, loss = {1}\n'.format(i, 1.0 / (i + 1)) for i in range(25)))
+        dispatch = RecordingDispatch()
+        dispatch.setup_display('iteration', ['iteration', 'loss'])
+        batches = []
+        train_events = dispatch.train_events
+        dispatch.train_events = lambda events: batches.append(len(events)) or train_events(events)
+        tailer = LogTailer(self.log, 'iteration', CAFFE, offset_path=self.offset, batch_size=10,
+                           poll_interval=0.01)
+        self.assertEqual(tailer.follow(dispatch, idle_timeout=0.05), 25)
+        self.assertEqual([e['iteration'] for e in dispatch.events], list(range(25)))
+        self.assertEqual(batches, [10, 10, 5])
+        with open(self.offset) as f:
+            self.assertEqual(json.load(f)['offset'], os.path.getsize(self.log))
+        tailer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from mri.utilities import RateLimiter, send_request
+from tests.stand_in_server import StandInServer
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_request_rate(self):
+        limiter = RateLimiter(requests_per_second=50, burst=0.1)
+        start = time.time()
+        for _ in range(30):
+            limiter.acquire()
+        self.assertTrue(time.time() - start >= 0.45)
+
+    def test_byte_rate(self):
+        limiter = RateLimiter(bytes_per_second=1000)
+        start = time.time()
+        limiter.acquire(1000)
+        self.assertTrue(time.time() - start < 0.05)
+        # Larger than the bucket, goes through once it refills
+        limiter.acquire(5000)
+        self.assertTrue(time.time() - start >= 0.95)
+
+    def test_fair_between_keys(self):
+        limiter = RateLimiter(requests_per_second=100, burst=0.01)
+        order = []
+
+        def send(key, count):
+            for _ in range(count):
+                limiter.acquire(key=key)
+                order.append(key)
+        threads = [threading.Thread(target=send, args=('busy', 10)) for _ in range(4)]
+        threads.append(threading.Thread(target=send, args=('quiet', 10)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(order), 50)
+        # The quiet report gets every other turn rather than waiting behind the busy one
+        self.assertTrue(len(order) - order[::-1].index('quiet') <= 25)
+
+    def test_shared_between_processes(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'limit')
+            limiters = [RateLimiter(requests_per_second=20, burst=0.1, lock_path=path) for _ in range(2)]
+            start = time.time()
+            for i in range(12):
+                limiters[i % 2].acquire()
+            self.assertTrue(time.time() - start >= 0.45)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_failed_wait(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        limiter = RateLimiter(requests_per_second=100, lock_path=os.path.join(folder, 'missing', 'x'))
+        errors = []
+
+        def acquire(key):
+            try:
+                limiter.acquire(key=key)
+            except (IOError, OSError) as ex:
+                errors.append(ex)
+        for key in ('a', 'b'):
+            thread = threading.Thread(target=acquire, args=(key,))
+            thread.daemon = True
+            thread.start()
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 2)
+        limiter.set_limits(requests_per_second=100)
+        limiter.acquire(key='a')
+        self.assertEqual((limiter._waiting, list(limiter._turns)), ({}, []))
+
+    def test_send_request(self):
+        self.assertFalse(RateLimiter.for_address('http://b.com/x').limited)
+        self.assertIs(RateLimiter.for_address('http://b.com/x'), RateLimiter.for_address('http://B.com/y'))
+        with StandInServer() as stand_in:
+            limiter = RateLimiter(requests_per_second=20, burst=0.05)
+            start = time.time()
+            for _ in range(6):
+                result = send_request(stand_in.address + '/api/reports', 'GET', None, None, limiter=limiter)
+                self.assertEqual(result.status_code, 200)
+            self.assertTrue(time.time() - start >= 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
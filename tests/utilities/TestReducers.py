@@ -0,0 +1,45 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import unittest
+
+from mri.utilities.reducers import EveryNth, LTTB, Window
+
+
+def run(reducer, points):
+    out = []
+    for t, v in points:
+        out.extend(reducer.push(t, v))
+    return out + reducer.flush()
+
+
+class TestReducers(unittest.TestCase):
+    def test_every_nth(self):
+        points = [(i, i) for i in range(10)]
+        self.assertEqual([t for t, _ in run(EveryNth(4), points)], [0, 4, 8, 9])
+        self.assertEqual([t for t, _ in run(EveryNth(5), points[:6])], [0, 5])
+
+    def test_window(self):
+        points = [(i, i) for i in range(7)]
+        self.assertEqual(run(Window(3), points), [(2, 1), (5, 4), (6, 6)])
+        self.assertEqual(run(Window(3, 'max'), points), [(2, 2), (5, 5), (6, 6)])
+        self.assertEqual(run(Window(3, 'min'), points), [(2, 0), (5, 3), (6, 6)])
+        with self.assertRaises(ValueError):
+            Window(3, 'median')
+
+    def test_lttb(self):
+        points = [(i, 0.0) for i in range(100)]
+        points[37] = (37, 50.0)
+        out = run(LTTB(10), points)
+        self.assertTrue(len(out) <= 12)
+        self.assertEqual(out[0], (0, 0.0))
+        self.assertEqual(out[-1], (99, 0.0))
+        self.assertTrue((37, 50.0) in out)
+        self.assertEqual([t for t, _ in out], sorted(t for t, _ in out))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import unittest
+
+from mri.utilities import ReportIndex
+
+
+class TestReportIndex(unittest.TestCase):
+    def test_search(self):
+        index = ReportIndex()
+        self.assertTrue(index.stale)
+        index.update({'1': 'sweep lr=0.1', '2': 'sweep lr=0.01', '3': 'baseline', '4': 'sweep lr=0.1'})
+        self.assertFalse(index.stale)
+        self.assertEqual(index.search('sweep lr=0.1'), ['1', '4'])
+        self.assertEqual(index.search('sweep', 'prefix'), ['2', '1', '4'])
+        self.assertEqual(index.search('line', 'substring'), ['3'])
+        self.assertEqual(index.search('missing'), [])
+        with self.assertRaises(ValueError):
+            index.search('x', 'regex')
+
+    def test_add_remove(self):
+        index = ReportIndex(ttl=0)
+        index.update({'1': 'a'})
+        index.add('2', 'b')
+        index.add('1', 'c')
+        self.assertEqual(index.reports(), {'1': 'c', '2': 'b'})
+        self.assertEqual(index.search('a'), [])
+        index.remove('2')
+        index.remove('unknown')
+        self.assertEqual(index.search('', 'prefix'), ['1'])
+
+    def test_registry(self):
+        index = ReportIndex()
+        ReportIndex.register('http://Example.com', index)
+        ReportIndex.notify_created('http://example.com/', '9', 'new')
+        self.assertEqual(index.search('new'), ['9'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import time
+import unittest
+
+import requests
+
+from mri.utilities import CircuitBreaker, send_request
+from tests.stand_in_server import StandInServer
+
+
+class FlakyServer(StandInServer):
+    def __init__(self, failures):
+        super(FlakyServer, self).__init__()
+        self.failures = failures
+
+    def respond(self, method, path, body, headers):
+        if self.failures:
+            self.failures -= 1
+            return 503, {'error': 'busy'}
+        return super(FlakyServer, self).respond(method, path, body, headers)
+
+
+class TestSendRequest(unittest.TestCase):
+    def test_retries(self):
+        with FlakyServer(failures=2) as stand_in:
+            breaker = CircuitBreaker()
+            result = send_request(stand_in.address + '/api/reports', 'GET', None, None,
+                                  retries=2, backoff=0.01, breaker=breaker)
+            self.assertEqual(result.status_code, 200)
+            self.assertEqual(len(stand_in.requests), 3)
+            # POST is never retried
+            stand_in.failures = 1
+            result = send_request(stand_in.address + '/api/events', 'POST', '{}', None,
+                                  retries=2, backoff=0.01, breaker=breaker)
+            self.assertEqual(result.status_code, 503)
+            self.assertEqual(len(stand_in.requests), 4)
+
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        for _ in range(2):
+            self.assertIsNone(send_request('http://127.0.0.1:1/', 'GET', None, None, breaker=breaker))
+        self.assertTrue(breaker.is_open)
+        start = time.time()
+        self.assertIsNone(send_request('http://127.0.0.1:1/', 'GET', None, None, breaker=breaker))
+        self.assertTrue(time.time() - start < 0.05)
+        time.sleep(0.25)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+
+    def test_failed_trial(self):
+        class BrokenSession(object):
+            def __init__(self, error):
+                self.error = error
+
+            def request(self, **kwargs):
+                raise self.error
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        for error in (requests.exceptions.ChunkedEncodingError('cut off'), RuntimeError('bug')):
+            time.sleep(0.06)
+            try:
+                self.assertIsNone(send_request('http://127.0.0.1:1/', 'GET', None, None,
+                                               session=BrokenSession(error), breaker=breaker))
+            except RuntimeError:
+                pass
+            # The failed trial re-opens the breaker, so another trial is allowed later
+            self.assertTrue(breaker.is_open)
+            self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+
+    def test_shared_breaker(self):
+        self.assertIs(CircuitBreaker.for_address('http://a.com/x'), CircuitBreaker.for_address('http://A.com/y'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import unittest
+
+from mri.utilities import SessionPool, send_request
+from tests.stand_in_server import StandInServer
+
+
+class TestSessionPool(unittest.TestCase):
+    def test_keyed_by_server(self):
+        pool = SessionPool(pool_size=2)
+        first = pool.get_session('http://Example.com/api/events')
+        self.assertIs(first, pool.get_session('http://example.com/api/reports'))
+        self.assertIsNot(first, pool.get_session('https://example.com/api/events'))
+        pool.close()
+        self.assertIsNot(first, pool.get_session('http://example.com/'))
+
+    def test_default_is_shared(self):
+        self.assertIs(SessionPool.default(), SessionPool.default())
+
+    def test_connection_reuse(self):
+        pool = SessionPool()
+        with StandInServer() as stand_in:
+            for _ in range(5):
+                session = pool.get_session(stand_in.address)
+                result = send_request(stand_in.address + '/api/events', 'POST', '{}', None, session)
+                self.assertEqual(result.status_code, 200)
+                self.assertIs(session, pool.get_session(stand_in.address))
+            self.assertEqual(stand_in.connections, 1)
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
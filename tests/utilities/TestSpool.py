@@ -0,0 +1,54 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import os
+import shutil
+import tempfile
+import unittest
+
+from mri.utilities import Spool
+
+
+class TestSpool(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'nested', 'test.spool')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_append_and_read(self):
+        spool = Spool(self.path, sync_every=3)
+        for i in range(10):
+            spool.append({'i': i})
+        self.assertEqual([p['i'] for p in spool], list(range(10)))
+        spool.close()
+        self.assertEqual(len(list(Spool(self.path))), 10)
+
+    def test_replay(self):
+        spool = Spool(self.path)
+        spool.extend([{'i': i} for i in range(25)])
+        batches = []
+        sent = spool.replay(lambda batch: batches.append(batch) or True, batch_size=10)
+        self.assertEqual(sent, 25)
+        self.assertEqual([len(b) for b in batches], [10, 10, 5])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_interrupted_replay(self):
+        spool = Spool(self.path)
+        spool.extend([{'i': i} for i in range(25)])
+        calls = []
+
+        def flaky(batch):
+            calls.append(batch)
+            return len(calls) < 2
+        self.assertEqual(spool.replay(flaky, batch_size=10), 10)
+        self.assertEqual([p['i'] for p in Spool(self.path)], list(range(10, 25)))
+        self.assertEqual(spool.replay(lambda batch: True), 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+import gzip
+import io
+import json
+import unittest
+
+from mri.utilities import wire_format
+
+
+class TestWireFormat(unittest.TestCase):
+    def setUp(self):
+        self.payloads = [{'type': 'train.a', 'properties': {'iteration': i, 'loss': i / 2.0}} for i in range(200)]
+        self.payloads.append({'type': 'train.b', 'properties': {'epoch': 1}})
+        self.payloads.append({'type': 'train.a', 'properties': {'iteration': 200, 'loss': None}})
+        self.payloads.append({'type': 'train.a', 'properties': {'iteration': 201}})
+
+    def test_round_trip(self):
+        for columnar in (False, True):
+            for compression in (None, 'gzip', 'deflate'):
+                body, headers = wire_format.encode_batch(self.payloads, columnar, compression)
+                self.assertEqual(wire_format.decode_batch(body, headers), self.payloads)
+
+    def test_compact(self):
+        plain, _ = wire_format.encode_batch(self.payloads)
+        columnar, headers = wire_format.encode_batch(self.payloads, columnar=True)
+        self.assertEqual(headers['Content-Type'], wire_format.COLUMNAR)
+        self.assertEqual(json.loads(columnar.decode('utf-8'))[0]['columns'], ['iteration', 'loss'])
+        self.assertTrue(len(columnar) < len(plain) / 2)
+        gzipped, _ = wire_format.encode_batch(self.payloads, columnar=True, compression='gzip')
+        self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(gzipped)).read(), columnar)
+        with self.assertRaises(ValueError):
+            wire_format.encode_batch(self.payloads, compression='brotli')
+
+
+if __name__ == '__main__':
+    unittest.main()